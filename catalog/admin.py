@@ -1,12 +1,95 @@
 from __future__ import annotations
 
+import datetime
+
+from django import forms
 from django.contrib import admin
+from django.contrib import messages
+from django.contrib.admin import helpers
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+from django.http import QueryDict
+from django.template.response import TemplateResponse
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from django.utils.translation import ngettext
 
+from .circulation import bulk_renew
+from .circulation import bulk_return
+from .constants import INLINE_PER_PAGE
+from .forms import RenewBookForm
 from .models import Author
 from .models import Book
 from .models import BookInstance
 from .models import Genre
+from .models import Hold
 from .models import Language
+from .pagination import EstimatedCountPaginator
+from .search import search_books
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Foreign key filter rendered as an autocomplete box: related rows are
+    searched on demand through the admin's autocomplete view instead of
+    listing every one of them in the sidebar. The related model's admin
+    must define ``search_fields``.
+    """
+
+    template = 'admin/catalog/autocomplete_filter.html'
+
+    def __init__(
+        self, field, request, params, model, model_admin, field_path,
+    ):
+        self.lookup_kwarg = (
+            f'{field_path}__{field.target_field.attname}__exact'
+        )
+        super().__init__(
+            field, request, params, model, model_admin, field_path,
+        )
+        self.widget = AutocompleteSelect(field, model_admin.admin_site)
+        self.widget.choices = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+        ).choices
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def get_facet_counts(self, pk_attname, filtered_qs):
+        return {}
+
+    def choices(self, changelist):
+        value = self.used_parameters.get(self.lookup_kwarg)
+        yield {
+            'selected': not value,
+            'query_string': changelist.get_query_string(
+                remove=[self.lookup_kwarg],
+            ),
+            'display': _('All'),
+            'widget': self.widget.render(
+                self.lookup_kwarg,
+                value[-1] if value else None,
+                attrs={'id': f'id_{self.lookup_kwarg}'},
+            ),
+            'hidden_params': [
+                (name, param)
+                for name, param in changelist.params.items()
+                if name != self.lookup_kwarg
+            ],
+        }
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables too large to count exactly."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        # Scripts of the AutocompleteFilter sidebar boxes.
+        return super().media + AutocompleteSelect(None, None).media
 
 
 @admin.register(Genre)
@@ -21,7 +104,73 @@ class LanguageAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
 
-class BookInline(admin.TabularInline):
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """
+    Inline formset over one page of the related rows, picked with the
+    ``<prefix>-page`` query parameter, so a change form costs the same
+    however many rows the relation holds.
+    """
+
+    per_page = INLINE_PER_PAGE
+    params = QueryDict()
+
+    @property
+    def page_param(self):
+        return f'{self.prefix}-page'
+
+    @cached_property
+    def page(self):
+        queryset = super().get_queryset()
+        # Pages need a total order to not overlap.
+        self._rows = queryset.order_by(
+            *(queryset.query.order_by or self.model._meta.ordering),
+            'pk',
+        )
+        return Paginator(self._rows, self.per_page).get_page(
+            self.params.get(self.page_param),
+        )
+
+    def get_queryset(self):
+        return self.page.object_list
+
+    def _existing_object(self, pk):
+        obj = super()._existing_object(pk)
+        if obj is None:
+            # The row moved to another page since the form was rendered.
+            obj = self._rows.filter(pk=pk).first()
+        return obj
+
+    def page_links(self):
+        links = []
+        for number in self.page.paginator.get_elided_page_range(
+            self.page.number,
+        ):
+            if number == Paginator.ELLIPSIS:
+                links.append({'number': number, 'ellipsis': True})
+                continue
+            params = self.params.copy()
+            params[self.page_param] = number
+            links.append({
+                'number': number,
+                'url': f'?{params.urlencode()}',
+                'current': number == self.page.number,
+            })
+        return links
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    formset = PaginatedInlineFormSet
+    template = 'admin/catalog/edit_inline/paginated_tabular.html'
+    per_page = INLINE_PER_PAGE
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.params = request.GET
+        return formset
+
+
+class BookInline(PaginatedTabularInline):
     model = Book
     extra = 0
     fields = ('title', 'summary', 'ISBN', 'language')
@@ -52,7 +201,7 @@ class AuthorAdmin(admin.ModelAdmin):
     inlines = [BookInline]
 
 
-class BookInstanceInline(admin.TabularInline):
+class BookInstanceInline(PaginatedTabularInline):
     model = BookInstance
     extra = 0
     fields = ('uniqueId', 'status', 'due_back')
@@ -60,9 +209,9 @@ class BookInstanceInline(admin.TabularInline):
 
 
 @admin.register(Book)
-class BookAdmin(admin.ModelAdmin):
+class BookAdmin(LargeTableAdmin):
     list_display = ('title', 'author', 'language', 'display_genre')
-    list_filter = ('author', 'language', 'genre')
+    list_filter = (('author', AutocompleteFilter), 'language', 'genre')
     search_fields = ('title', 'author__name', 'ISBN')
     filter_horizontal = ('genre',)
 
@@ -81,15 +230,31 @@ class BookAdmin(admin.ModelAdmin):
 
     inlines = [BookInstanceInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'author',
+            'language',
+        ).prefetch_related('genre')
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_books(search_term, queryset), False
+
     def display_genre(self, obj):
         return ', '.join([genre.name for genre in obj.genre.all()[:3]])
     display_genre.short_description = 'Genre'
 
 
 @admin.register(BookInstance)
-class BookInstanceAdmin(admin.ModelAdmin):
+class BookInstanceAdmin(LargeTableAdmin):
     list_display = ('book', 'status', 'borrower', 'due_back', 'uniqueId')
-    list_filter = ('status', 'due_back', 'book__language', 'borrower')
+    list_filter = (
+        'status',
+        'due_back',
+        'book__language',
+        ('borrower', AutocompleteFilter),
+    )
     search_fields = ('uniqueId', 'book__title', 'borrower__username')
     date_hierarchy = 'due_back'
 
@@ -107,3 +272,70 @@ class BookInstanceAdmin(admin.ModelAdmin):
     )
 
     readonly_fields = ('uniqueId',)
+    actions = ['renew_selected', 'return_selected']
+
+    def has_mark_returned_permission(self, request):
+        return request.user.has_perm('catalog.can_mark_returned')
+
+    def report_bulk_result(self, request, result):
+        self.message_user(
+            request,
+            ngettext(
+                '%(count)d copy updated.',
+                '%(count)d copies updated.',
+                len(result.updated),
+            ) % {'count': len(result.updated)},
+            messages.SUCCESS,
+        )
+        for copy_id, error in result.failures.items():
+            self.message_user(request, f'{copy_id}: {error}', messages.WARNING)
+
+    @admin.action(
+        description=_('Renew selected copies'),
+        permissions=['mark_returned'],
+    )
+    def renew_selected(self, request, queryset):
+        if 'apply' in request.POST:
+            form = RenewBookForm(request.POST)
+            if form.is_valid():
+                result = bulk_renew(
+                    list(queryset.values_list('pk', flat=True)),
+                    form.cleaned_data['renewal_date'],
+                )
+                self.report_bulk_result(request, result)
+                return None
+        else:
+            form = RenewBookForm(initial={
+                'renewal_date': datetime.date.today() +
+                datetime.timedelta(weeks=3),
+            })
+        context = {
+            **self.admin_site.each_context(request),
+            'title': _('Renew selected copies'),
+            'opts': self.model._meta,
+            'form': form,
+            'copies': queryset.select_related('book'),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(
+            request,
+            'admin/catalog/bookinstance/renew_selected.html',
+            context,
+        )
+
+    @admin.action(
+        description=_('Return selected copies'),
+        permissions=['mark_returned'],
+    )
+    def return_selected(self, request, queryset):
+        result = bulk_return(list(queryset.values_list('pk', flat=True)))
+        self.report_bulk_result(request, result)
+
+
+@admin.register(Hold)
+class HoldAdmin(admin.ModelAdmin):
+    list_display = ('book', 'patron', 'created_at', 'fulfilled_at', 'copy')
+    list_filter = ('created_at', 'fulfilled_at')
+    search_fields = ('book__title', 'patron__username')
+    raw_id_fields = ('book', 'patron', 'copy')
+    date_hierarchy = 'created_at'
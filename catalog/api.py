@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count
+from django.db.models import Q
+from django.utils.translation import gettext as _
+
+from catalog.caching import cached
+from catalog.caching import get_versions
+from catalog.caching import model_scope
+from catalog.constants import API_FIELDS_PARAM
+from catalog.constants import API_LIMIT_PARAM
+from catalog.constants import API_MAX_PAGE_SIZE
+from catalog.constants import API_PAGE_SIZE
+from catalog.constants import KEYSET_CURSOR_PARAM
+from catalog.constants import LoanStatusEnum
+from catalog.models import Author
+from catalog.models import Book
+from catalog.models import BookInstance
+from catalog.models import Language
+from catalog.pagination import KeysetPaginator
+
+# Resource -> (queryset, field name -> ORM lookup, keyset ordering, models
+# whose changes invalidate the ETag). Rows come straight from values(), so
+# no model instances are built; ordering lookups must be projected.
+API_RESOURCES = {
+    'books': (
+        lambda: Book.objects.all(),
+        {
+            'id': 'id',
+            'title': 'title',
+            'author': 'author_id',
+            'author_name': 'author__name',
+            'summary': 'summary',
+            'isbn': 'ISBN',
+            'language': 'language__name',
+        },
+        ('title', 'id'),
+        (Book, Author, Language),
+    ),
+    'authors': (
+        lambda: Author.objects.all(),
+        {
+            'id': 'id',
+            'name': 'name',
+            'date_of_birth': 'date_of_birth',
+            'date_of_death': 'date_of_death',
+        },
+        ('name', 'id'),
+        (Author,),
+    ),
+    'copies': (
+        lambda: BookInstance.objects.all(),
+        {
+            'id': 'uniqueId',
+            'book': 'book_id',
+            'title': 'book__title',
+            'imprint': 'imprint',
+            'status': 'status',
+            'due_back': 'due_back',
+        },
+        ('uniqueId',),
+        (BookInstance, Book),
+    ),
+    'availability': (
+        lambda: Book.objects.annotate(
+            copies=Count('bookinstance'),
+            available=Count(
+                'bookinstance',
+                filter=Q(
+                    bookinstance__status=LoanStatusEnum.AVAILABLE.code,
+                ),
+            ),
+        ),
+        {
+            'id': 'id',
+            'title': 'title',
+            'copies': 'copies',
+            'available': 'available',
+        },
+        ('title', 'id'),
+        (Book, BookInstance),
+    ),
+}
+
+
+class ApiError(ValueError):
+    pass
+
+
+def requested_columns(resource, params):
+    columns = API_RESOURCES[resource][1]
+    value = params.get(API_FIELDS_PARAM)
+    if not value:
+        return columns
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = sorted(set(names) - set(columns))
+    if unknown:
+        raise ApiError(
+            _('Unknown fields: %(fields)s') % {'fields': ', '.join(unknown)},
+        )
+    return {name: columns[name] for name in names}
+
+
+def page_size(params):
+    value = params.get(API_LIMIT_PARAM)
+    if not value:
+        return API_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        size = 0
+    if not 1 <= size <= API_MAX_PAGE_SIZE:
+        raise ApiError(
+            _('limit must be between 1 and %(max)s.') % {
+                'max': API_MAX_PAGE_SIZE,
+            },
+        )
+    return size
+
+
+def _models(resource, *args):
+    return API_RESOURCES[resource][3]
+
+
+def _key(resource, *args):
+    # The parameters a response depends on; the last argument is always
+    # the request's query parameters.
+    *pk, params = args
+    return (
+        resource,
+        *map(str, pk),
+        *(f'{name}={params.get(name, "")}' for name in (
+            API_FIELDS_PARAM, API_LIMIT_PARAM, KEYSET_CURSOR_PARAM,
+        )),
+    )
+
+
+def resource_etag(resource, params, pk=None):
+    """
+    Strong ETag for a response, built only from the cached versions of the
+    models it reads and the request parameters, so a matching
+    If-None-Match is answered without running a query.
+    """
+    versions = get_versions([
+        model_scope(model) for model in _models(resource)
+    ])
+    key = '|'.join([
+        *_key(resource, pk, params),
+        *(versions[scope] for scope in sorted(versions)),
+    ])
+    return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+
+
+def _project(rows, columns):
+    return [
+        {name: row[lookup] for name, lookup in columns.items()}
+        for row in rows
+    ]
+
+
+@cached(_models, key=_key)
+def list_resource(resource, params):
+    """``(rows, next_cursor, previous_cursor)`` for one page."""
+    queryset = API_RESOURCES[resource][0]
+    ordering = API_RESOURCES[resource][2]
+    columns = requested_columns(resource, params)
+    paginator = KeysetPaginator(
+        queryset().values(*{*columns.values(), *ordering}),
+        page_size(params),
+        ordering,
+    )
+    page = paginator.page(params.get(KEYSET_CURSOR_PARAM))
+    return (
+        _project(page.object_list, columns),
+        page.next_cursor,
+        page.previous_cursor,
+    )
+
+
+@cached(_models, key=_key)
+def get_resource(resource, pk, params):
+    queryset = API_RESOURCES[resource][0]
+    columns = requested_columns(resource, params)
+    try:
+        rows = list(queryset().filter(pk=pk).values(*columns.values()))
+    except (ValidationError, ValueError):
+        return None
+    return _project(rows, columns)[0] if rows else None
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.paginator import InvalidPage
+from django.core.paginator import Page
+from django.http import Http404
+from django.template.loader import render_to_string
+from django.template.response import TemplateResponse
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+from django.utils.translation import gettext as _
+
+from catalog import views
+from catalog.caching import book_detail_cache_key
+from catalog.constants import BOOK_DETAIL_CACHE_TIMEOUT
+from catalog.models import LibraryStats
+from catalog.pagination import KeysetPaginator
+from catalog.visits import aget_visit_count
+from catalog.visits import arecord_visit
+
+# Django runs every async ORM call on one shared database thread, so
+# gathered queries do not execute in parallel on the database; they only
+# stop the event loop from blocking while each one runs. Templates are
+# rendered by the handler in that thread too, via TemplateResponse.
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def index(request):
+    stats, num_visits = await asyncio.gather(
+        LibraryStats.aload(),
+        aget_visit_count(request),
+    )
+    context = {
+        'num_book': stats.num_books,
+        'num_instances': stats.num_instances,
+        'num_instances_available': stats.num_instances_available,
+        'num_authors': stats.num_authors,
+        'num_visits': num_visits,
+    }
+    response = TemplateResponse(request, 'index.html', context=context)
+    await arecord_visit(request, response, num_visits)
+    return response
+
+
+class AsyncListMixin:
+    """
+    Async ``get`` for the catalog ListViews: the page rows and the total
+    count are fetched concurrently with the async ORM.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        paginator, page = await self.apaginate_queryset(
+            queryset,
+            self.get_paginate_by(queryset),
+        )
+        self.object_list = page.object_list
+        context = {
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'object_list': page.object_list,
+            'view': self,
+            **(self.extra_context or {}),
+        }
+        context_object_name = self.get_context_object_name(queryset)
+        if context_object_name is not None:
+            context[context_object_name] = page.object_list
+        return self.render_to_response(context)
+
+    async def apaginate_queryset(self, queryset, page_size):
+        if self.keyset_enabled():
+            paginator = KeysetPaginator(
+                queryset,
+                page_size,
+                self.keyset_ordering,
+            )
+            try:
+                page = await paginator.apage(
+                    self.request.GET.get(self.cursor_kwarg),
+                )
+            except InvalidPage as e:
+                raise Http404(str(e))
+            return paginator, page
+
+        paginator = self.get_paginator(
+            queryset,
+            page_size,
+            orphans=self.get_paginate_orphans(),
+            allow_empty_first_page=self.get_allow_empty(),
+        )
+        page_kwarg = self.page_kwarg
+        page = self.kwargs.get(page_kwarg) or \
+            self.request.GET.get(page_kwarg) or 1
+        # Paginators that estimate large counts bring their own.
+        acount = getattr(paginator, 'acount', queryset.acount)
+        try:
+            if page == 'last':
+                paginator.count = await acount()
+                number = paginator.num_pages
+            else:
+                number = int(page)
+            bottom = max(number - 1, 0) * paginator.per_page
+            top = bottom + paginator.per_page + paginator.orphans
+            if page == 'last':
+                rows = await alist(queryset[bottom:top])
+            else:
+                paginator.count, rows = await asyncio.gather(
+                    acount(),
+                    alist(queryset[bottom:top]),
+                )
+            number = paginator.validate_number(number)
+        except ValueError:
+            raise Http404(
+                _('Page is not “last”, nor can it be converted to an int.'),
+            )
+        except InvalidPage as e:
+            raise Http404(
+                _('Invalid page (%(page_number)s): %(message)s') % {
+                    'page_number': page,
+                    'message': str(e),
+                },
+            )
+        if number < paginator.num_pages:
+            rows = rows[:paginator.per_page]
+        return paginator, Page(rows, number, paginator)
+
+
+class AsyncDetailMixin:
+    async def aget_object(self):
+        if getattr(self, 'object', None) is not None:
+            return self.object
+        queryset = self.get_queryset().filter(
+            pk=self.kwargs[self.pk_url_kwarg],
+        )
+        try:
+            return await queryset.aget()
+        except queryset.model.DoesNotExist:
+            raise Http404(
+                _('No %(verbose_name)s found matching the query') % {
+                    'verbose_name': queryset.model._meta.verbose_name,
+                },
+            )
+
+
+class BookListView(AsyncListMixin, views.BookListView):
+    pass
+
+
+class AuthorListView(AsyncListMixin, views.AuthorListView):
+    pass
+
+
+class BookDetailView(AsyncDetailMixin, views.BookDetailView):
+    async def get(self, request, *args, **kwargs):
+        key = await sync_to_async(book_detail_cache_key)(
+            self.kwargs['pk'],
+            get_language(),
+        )
+        body = await cache.aget(key)
+        if body is None:
+            self.object, book_instances = await asyncio.gather(
+                self.aget_object(),
+                alist(self.get_book_instances()),
+            )
+            context = self.get_context_data(
+                object=self.object,
+                book_instances=book_instances,
+            )
+            body = await sync_to_async(render_to_string)(
+                self.body_template_name,
+                context,
+            )
+            await cache.aset(key, body, BOOK_DETAIL_CACHE_TIMEOUT)
+        return self.render_to_response({
+            'book_detail_body': mark_safe(body),
+            'book_pk': self.kwargs['pk'],
+        })
+
+
+class AuthorDetailView(AsyncDetailMixin, views.AuthorDetailView):
+    async def get(self, request, *args, **kwargs):
+        self.object, author_books = await asyncio.gather(
+            self.aget_object(),
+            sync_to_async(self.get_author_books)(),
+        )
+        return self.render_to_response(
+            self.get_context_data(
+                object=self.object,
+                author_books=author_books,
+            ),
+        )
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import statistics
+import time
+import tracemalloc
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf.urls.i18n import i18n_patterns
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count
+from django.test import AsyncClient
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import include
+from django.urls import path
+from django.urls import reverse
+from django.urls.converters import UUIDConverter
+
+from catalog.constants import BENCHMARK_POST_ONLY_URLS
+from catalog.constants import BENCHMARK_URL_KWARGS
+from catalog.constants import LoanStatusEnum
+from catalog.models import Author
+from catalog.models import Book
+from catalog.models import BookInstance
+from catalog.urls import catalog_urlpatterns
+from catalog.urls import read_urlpatterns
+from catalog.urls import urlpatterns
+
+INDEX_PLAN_PATTERNS = {
+    'sqlite': re.compile(r'USING (COVERING )?INDEX'),
+    'postgresql': re.compile(r'Index (Only )?Scan|Bitmap Index Scan'),
+}
+SCAN_PLAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN catalog_bookinstance\b(?! USING)'),
+    'postgresql': re.compile(r'Seq Scan on catalog_bookinstance'),
+}
+
+
+def hot_queries():
+    """The BookInstance access paths used by the catalog views."""
+    busiest_book = Book.objects.annotate(
+        copies=Count('bookinstance'),
+    ).order_by('-copies').first()
+    busiest_borrower = User.objects.annotate(
+        loans=Count('bookinstance'),
+    ).order_by('-loans').first()
+    return {
+        'available copies (index)': BookInstance.objects.filter(
+            status__exact=LoanStatusEnum.AVAILABLE.code,
+        ).order_by().values('pk'),
+        'loans by borrower (my-borrowed)': BookInstance.objects.filter(
+            borrower=busiest_borrower,
+            status__exact=LoanStatusEnum.ON_LOAN.code,
+        ).order_by('due_back'),
+        'copies of a book (book-detail)': BookInstance.objects.filter(
+            book=busiest_book,
+        ).order_by('status', 'due_back'),
+        'overdue loans (overdue-loans)': BookInstance.objects.overdue(
+        ).order_by('due_back', 'uniqueId'),
+    }
+
+
+def analyze(using=DEFAULT_DB_ALIAS):
+    with connections[using].cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def explain_hot_queries(using=DEFAULT_DB_ALIAS):
+    """
+    Return ``(name, plan, uses_index)`` for every hot query. A plan only
+    counts as indexed if it seeks an index and never scans the table.
+    """
+    vendor = connections[using].vendor
+    if vendor not in INDEX_PLAN_PATTERNS:
+        raise ValueError(f'No plan checks for {vendor}.')
+    results = []
+    for name, queryset in hot_queries().items():
+        plan = queryset.using(using).explain()
+        uses_index = bool(
+            INDEX_PLAN_PATTERNS[vendor].search(plan) and
+            not SCAN_PLAN_PATTERNS[vendor].search(plan),
+        )
+        results.append((name, plan, uses_index))
+    return results
+
+
+def sample_objects():
+    return {
+        Book: Book.objects.annotate(
+            copies=Count('bookinstance'),
+        ).order_by('-copies').first(),
+        Author: Author.objects.annotate(
+            books=Count('book'),
+        ).order_by('-books').first(),
+        BookInstance: BookInstance.objects.filter(
+            status__exact=LoanStatusEnum.ON_LOAN.code,
+        ).order_by().first(),
+    }
+
+
+def catalog_urls(samples):
+    """
+    Yield ``(name, url)`` for every GET route in catalog/urls.py. Primary
+    keys come from the sample object of the view's model (UUIDs always
+    refer to a BookInstance); other arguments from BENCHMARK_URL_KWARGS.
+    """
+    for pattern in urlpatterns:
+        if pattern.name in BENCHMARK_POST_ONLY_URLS:
+            continue
+        kwargs = {}
+        view_class = getattr(pattern.callback, 'view_class', None)
+        for name, converter in pattern.pattern.converters.items():
+            if name != 'pk':
+                kwargs[name] = BENCHMARK_URL_KWARGS[name]
+                continue
+            if isinstance(converter, UUIDConverter):
+                model = BookInstance
+            else:
+                model = getattr(view_class, 'model', None)
+            sample = samples.get(model)
+            if sample is None:
+                break
+            kwargs[name] = sample.pk
+        else:
+            yield pattern.name, reverse(pattern.name, kwargs=kwargs)
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    quartiles = statistics.quantiles(timings, n=4) if len(timings) > 1 \
+        else [timings[0]] * 3
+    mean = statistics.fmean(timings)
+    return {
+        'min': timings[0],
+        'max': timings[-1],
+        'mean': mean,
+        'stddev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'median': statistics.median(timings),
+        'q1': quartiles[0],
+        'q3': quartiles[2],
+        'iqr': quartiles[2] - quartiles[0],
+        'rounds': len(timings),
+        'ops': 1 / mean if mean else 0.0,
+    }
+
+
+def benchmark_url(client, url, rounds, warmup=1, clear_cache=False):
+    for _ in range(warmup):
+        client.get(url)
+
+    timings = []
+    for _ in range(rounds):
+        if clear_cache:
+            cache.clear()
+        started = time.perf_counter()
+        response = client.get(url)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        timings.append(time.perf_counter() - started)
+
+    # Queries and memory are measured on a separate pass because tracing
+    # allocations would distort the timings above.
+    if clear_cache:
+        cache.clear()
+    tracemalloc.start()
+    with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+        response = client.get(url)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(timings), {
+        'url': url,
+        'status_code': response.status_code,
+        'queries': len(queries),
+        'peak_memory_bytes': peak,
+    }
+
+
+def read_urlconf(read_views):
+    """
+    A root URLconf serving the catalog with its read pages taken from
+    ``read_views``, so sync and async views can be compared side by side.
+    """
+    urlconf = types.ModuleType(f'{read_views.__name__}_urlconf')
+    urlconf.urlpatterns = i18n_patterns(
+        path('accounts/', include('django.contrib.auth.urls')),
+        path('catalog/', include(catalog_urlpatterns(read_views))),
+    )
+    return urlconf
+
+
+def read_urls(samples, read_views):
+    names = {pattern.name for pattern in read_urlpatterns(read_views)}
+    return [
+        (name, url) for name, url in catalog_urls(samples) if name in names
+    ]
+
+
+def _split(requests, concurrency):
+    share, extra = divmod(requests, concurrency)
+    return [share + (i < extra) for i in range(concurrency)]
+
+
+def wsgi_throughput(url, requests, concurrency):
+    """Requests per second through the WSGI handler on a thread pool."""
+    def worker(count):
+        client = Client()
+        try:
+            return [client.get(url).status_code for _ in range(count)]
+        finally:
+            if concurrency > 1:
+                connections.close_all()
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        statuses = worker(requests)
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            statuses = [
+                status
+                for chunk in pool.map(worker, _split(requests, concurrency))
+                for status in chunk
+            ]
+    return requests / (time.perf_counter() - started), set(statuses)
+
+
+async def asgi_throughput(url, requests, concurrency):
+    """Requests per second through the ASGI handler on one event loop."""
+    async def worker(count):
+        client = AsyncClient()
+        return [(await client.get(url)).status_code for _ in range(count)]
+
+    started = time.perf_counter()
+    chunks = await asyncio.gather(
+        *(worker(count) for count in _split(requests, concurrency)),
+    )
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, {status for chunk in chunks for status in chunk}
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from catalog.constants import CACHE_KEY_PREFIX
+from catalog.constants import QUERY_CACHE_LOCAL_ENTRIES
+from catalog.constants import QUERY_CACHE_LOCK_TIMEOUT
+from catalog.constants import QUERY_CACHE_POLL_INTERVAL
+from catalog.constants import QUERY_CACHE_TIMEOUT
+from catalog.models import Book
+from catalog.replicas import primary_reads
+
+_MISSING = object()
+
+
+def version_key(scope):
+    return f'{CACHE_KEY_PREFIX}:version:{scope}'
+
+
+def new_version():
+    # Versions are random tokens rather than counters: if a version key is
+    # evicted, the replacement can never collide with an older token.
+    return uuid.uuid4().hex[:16]
+
+
+def get_version(scope):
+    key = version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        version = new_version()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def get_versions(scopes):
+    """Like get_version() for several scopes in one cache round trip."""
+    keys = {scope: version_key(scope) for scope in scopes}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for scope, key in keys.items():
+        versions[scope] = found.get(key) or get_version(scope)
+    return versions
+
+
+def bump_versions(scopes):
+    cache.set_many(
+        {version_key(scope): new_version() for scope in scopes},
+        None,
+    )
+
+
+def book_scope(pk):
+    return f'book:{pk}'
+
+
+def model_scope(model):
+    return f'model:{model._meta.label_lower}'
+
+
+def book_detail_cache_key(pk, language):
+    version = get_version(book_scope(pk))
+    return f'{CACHE_KEY_PREFIX}:book-detail:{pk}:{language}:{version}'
+
+
+def book_state_cache_key(pk):
+    version = get_version(book_scope(pk))
+    return f'{CACHE_KEY_PREFIX}:book-state:{pk}:{version}'
+
+
+def mark_books_changed(book_ids, touch=True):
+    """
+    Invalidate everything cached for the given books once the current
+    transaction commits, so readers cannot re-cache uncommitted state.
+    With ``touch`` their ``updated_at`` is also moved to now, in the same
+    transaction as the change.
+    """
+    pks = {pk for pk in book_ids if pk is not None}
+    if not pks:
+        return
+    if touch:
+        Book.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+    scopes = {book_scope(pk) for pk in pks}
+    transaction.on_commit(lambda: bump_versions(scopes))
+
+
+def mark_models_changed(models):
+    """Invalidate every model-wide version, e.g. API ETags, on commit."""
+    scopes = {model_scope(model) for model in models}
+    if scopes:
+        transaction.on_commit(lambda: bump_versions(scopes))
+
+
+class LocalCache:
+    """
+    In-process LRU in front of the shared cache. Query results are stored
+    under versioned keys, so entries never need invalidating: a version
+    bump makes them unreachable and they age out. Values are shared by
+    every thread of the process and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalCache(QUERY_CACHE_LOCAL_ENTRIES)
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+@contextmanager
+def _flight(key):
+    with _flights_lock:
+        lock = _flights.setdefault(key, threading.Lock())
+    with lock:
+        yield
+    with _flights_lock:
+        if _flights.get(key) is lock:
+            del _flights[key]
+
+
+def _compute_once(cache_key, compute, timeout):
+    """
+    Compute a missing value once however many requests miss it together:
+    threads of this process queue on a lock, other processes wait for the
+    one holding a short-lived lock key in the shared cache.
+    """
+    with _flight(cache_key):
+        value = cache.get(cache_key, _MISSING)
+        if value is not _MISSING:
+            return value
+        lock_key = f'{cache_key}:lock'
+        if not cache.add(lock_key, 1, QUERY_CACHE_LOCK_TIMEOUT):
+            deadline = time.monotonic() + QUERY_CACHE_LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(QUERY_CACHE_POLL_INTERVAL)
+                value = cache.get(cache_key, _MISSING)
+                if value is not _MISSING:
+                    return value
+            # The holder died or is stuck; compute rather than wait on.
+            lock_key = None
+        try:
+            # A lagging replica would store old rows under new versions.
+            with primary_reads():
+                value = compute()
+            cache.set(cache_key, value, timeout)
+        finally:
+            if lock_key is not None:
+                cache.delete(lock_key)
+    return value
+
+
+def cached_query(name, models, compute, key=(), timeout=QUERY_CACHE_TIMEOUT):
+    """
+    Return ``compute()`` through the in-process and shared caches, under
+    ``key`` and the current versions of ``models``. Any write to one of
+    those models bumps its version, so stale results are never served.
+    """
+    versions = get_versions([model_scope(model) for model in models])
+    digest = hashlib.md5(
+        '|'.join([
+            *map(str, key),
+            *(versions[scope] for scope in sorted(versions)),
+        ]).encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    cache_key = f'{CACHE_KEY_PREFIX}:query:{name}:{digest}'
+    value = local_cache.get(cache_key, _MISSING)
+    if value is not _MISSING:
+        return value
+    value = cache.get(cache_key, _MISSING)
+    if value is _MISSING:
+        value = _compute_once(cache_key, compute, timeout)
+    local_cache.set(cache_key, value, timeout)
+    return value
+
+
+def cached(models, key=None, timeout=QUERY_CACHE_TIMEOUT):
+    """
+    Decorator running a function through cached_query(). ``models`` is a
+    sequence of models, or a callable taking the function's arguments and
+    returning one; ``key`` maps those arguments to the rest of the cache
+    key and is required for methods. The function must return picklable,
+    fully evaluated data, not a lazy queryset.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return cached_query(
+                name,
+                models(*args, **kwargs) if callable(models) else models,
+                lambda: func(*args, **kwargs),
+                key=key(*args, **kwargs) if key else (
+                    *args,
+                    *sorted(kwargs.items()),
+                ),
+                timeout=timeout,
+            )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,445 @@
+from __future__ import annotations
+
+import datetime
+from collections import defaultdict
+from dataclasses import dataclass
+from dataclasses import field
+
+from django.db import connections
+from django.db import router
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import Q
+from django.db.models import UUIDField
+from django.db.models import Value
+from django.db.models import When
+from django.utils import timezone
+
+from catalog.caching import mark_books_changed
+from catalog.caching import mark_models_changed
+from catalog.constants import CIRCULATION_CANDIDATES
+from catalog.constants import CIRCULATION_LOAN_WEEKS
+from catalog.constants import CIRCULATION_NO_COPIES_ERROR
+from catalog.constants import CIRCULATION_NOT_AVAILABLE_ERROR
+from catalog.constants import CIRCULATION_NOT_FOUND_ERROR
+from catalog.constants import CIRCULATION_NOT_ON_LOAN_ERROR
+from catalog.constants import HOLD_PICKUP_DAYS
+from catalog.constants import LoanStatusEnum
+from catalog.models import Book
+from catalog.models import BookInstance
+from catalog.models import Hold
+from catalog.models import LibraryStats
+
+
+class CirculationError(Exception):
+    pass
+
+
+@dataclass
+class BulkResult:
+    updated: list = field(default_factory=list)
+    failures: dict = field(default_factory=dict)
+
+
+def _split_loans(copy_ids):
+    """
+    Lock the requested copies with one query and split them into on-loan
+    copies, which can be renewed or returned, and per-copy failures.
+    """
+    rows = {
+        pk: (status, book_id)
+        for pk, status, book_id in BookInstance.objects.select_for_update(
+        ).filter(pk__in=copy_ids).order_by().values_list(
+            'pk',
+            'status',
+            'book_id',
+        )
+    }
+    result, copies_by_book = BulkResult(), defaultdict(list)
+    for pk in copy_ids:
+        if pk not in rows:
+            result.failures[pk] = CIRCULATION_NOT_FOUND_ERROR
+        elif rows[pk][0] != LoanStatusEnum.ON_LOAN.code:
+            result.failures[pk] = CIRCULATION_NOT_ON_LOAN_ERROR
+        else:
+            result.updated.append(pk)
+            copies_by_book[rows[pk][1]].append(pk)
+    return result, copies_by_book
+
+
+def _record(book_ids, available_delta=0):
+    """
+    Once the current transaction commits, move the available counter by
+    ``available_delta`` and touch the books' ``updated_at``. Both update
+    rows every desk shares, the single stats row and a popular title's
+    Book row; inside a lending transaction their locks would be held until
+    commit, queueing desks that locked different copies behind each other.
+    Run after commit, each is its own short autocommitted UPDATE. A crash
+    in between leaves the counter for rebuild_library_stats to repair.
+    """
+    book_ids = set(book_ids)
+
+    def record():
+        LibraryStats.bump(num_instances_available=available_delta)
+        mark_books_changed(book_ids)
+        mark_models_changed([BookInstance])
+
+    transaction.on_commit(record)
+
+
+def _apply(result, book_ids, available_delta=0, **changes):
+    # QuerySet.update() skips signals and auto_now, so do their work here.
+    BookInstance.objects.filter(pk__in=result.updated).update(
+        updated_at=timezone.now(),
+        **changes,
+    )
+    _record(book_ids, available_delta)
+
+
+def bulk_renew(copy_ids, renewal_date):
+    """Move the due date of every on-loan copy in ``copy_ids``."""
+    with transaction.atomic():
+        result, copies_by_book = _split_loans(copy_ids)
+        if result.updated:
+            _apply(result, copies_by_book, due_back=renewal_date)
+    return result
+
+
+def bulk_return(copy_ids):
+    """
+    Check in every on-loan copy in ``copy_ids``. Copies of titles with a
+    hold queue go straight to the patrons waiting longest.
+    """
+    with transaction.atomic():
+        result, copies_by_book = _split_loans(copy_ids)
+        if result.updated:
+            _apply(
+                result,
+                copies_by_book,
+                available_delta=len(result.updated),
+                status=LoanStatusEnum.AVAILABLE.code,
+                due_back=None,
+                borrower=None,
+            )
+            _allocate(copies_by_book)
+    return result
+
+
+def default_due_back():
+    return datetime.date.today() + datetime.timedelta(
+        weeks=CIRCULATION_LOAN_WEEKS,
+    )
+
+
+def _transition(condition, book_id, available_delta, **changes):
+    """
+    Apply one status change with a single conditional UPDATE. The WHERE
+    clause re-checks the expected status, so of two desks racing for the
+    same copy exactly one matches a row. Nothing is read first, and the
+    only lock taken is the copy's own row lock, held until commit; the
+    shared counter and book rows are written after commit by _record().
+    """
+    with transaction.atomic():
+        updated = BookInstance.objects.filter(condition).update(
+            updated_at=timezone.now(),
+            **changes,
+        )
+        if updated:
+            _record([book_id], available_delta)
+    return bool(updated)
+
+
+def _book_id(copy_id):
+    book_id = BookInstance.objects.filter(pk=copy_id).values_list(
+        'book_id',
+        flat=True,
+    ).first()
+    if book_id is None:
+        raise CirculationError(CIRCULATION_NOT_FOUND_ERROR)
+    return book_id
+
+
+def _loan_changes(borrower, due_back):
+    return {
+        'status': LoanStatusEnum.ON_LOAN.code,
+        'borrower': borrower,
+        'due_back': due_back or default_due_back(),
+    }
+
+
+def checkout(copy_id, borrower, due_back=None):
+    """Lend one specific copy, failing if another desk got there first."""
+    book_id = _book_id(copy_id)
+    changes = _loan_changes(borrower, due_back)
+    # A reserved copy can only be lent to the patron it is held for, and
+    # already left the available count when it was reserved.
+    if not _transition(
+        Q(pk=copy_id, status=LoanStatusEnum.RESERVED.code, borrower=borrower),
+        book_id,
+        0,
+        **changes,
+    ) and not _transition(
+        Q(pk=copy_id, status=LoanStatusEnum.AVAILABLE.code),
+        book_id,
+        -1,
+        **changes,
+    ):
+        raise CirculationError(CIRCULATION_NOT_AVAILABLE_ERROR)
+    return copy_id
+
+
+def checkout_any(book_id, borrower, due_back=None):
+    """
+    Lend any available copy of a book. Where the database supports it the
+    copy is claimed with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    desks each lock a different row instead of queueing on the same one.
+    Elsewhere a few candidates are tried with conditional UPDATEs until
+    one sticks or none are left.
+    """
+    copies = BookInstance.objects.filter(
+        book_id=book_id,
+        status=LoanStatusEnum.AVAILABLE.code,
+    ).order_by()
+    changes = _loan_changes(borrower, due_back)
+    connection = connections[router.db_for_write(BookInstance)]
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            copy_id = copies.select_for_update(
+                skip_locked=True,
+            ).values_list('pk', flat=True).first()
+            if copy_id is None:
+                raise CirculationError(CIRCULATION_NO_COPIES_ERROR)
+            _transition(Q(pk=copy_id), book_id, -1, **changes)
+        return copy_id
+
+    while True:
+        candidates = list(
+            copies.values_list('pk', flat=True)[:CIRCULATION_CANDIDATES],
+        )
+        if not candidates:
+            raise CirculationError(CIRCULATION_NO_COPIES_ERROR)
+        for copy_id in candidates:
+            if _transition(
+                Q(pk=copy_id, status=LoanStatusEnum.AVAILABLE.code),
+                book_id,
+                -1,
+                **changes,
+            ):
+                return copy_id
+
+
+def return_copy(copy_id):
+    """
+    Check a copy back in. If patrons are queued for the book, the copy is
+    reserved for the first of them in the same transaction.
+    """
+    book_id = _book_id(copy_id)
+    with transaction.atomic():
+        if not _transition(
+            Q(pk=copy_id, status=LoanStatusEnum.ON_LOAN.code),
+            book_id,
+            1,
+            status=LoanStatusEnum.AVAILABLE.code,
+            borrower=None,
+            due_back=None,
+        ):
+            raise CirculationError(CIRCULATION_NOT_ON_LOAN_ERROR)
+        _allocate({book_id: [copy_id]})
+    return copy_id
+
+
+def reserve(copy_id, borrower):
+    """Hold an available copy for ``borrower``."""
+    if not _transition(
+        Q(pk=copy_id, status=LoanStatusEnum.AVAILABLE.code),
+        _book_id(copy_id),
+        -1,
+        status=LoanStatusEnum.RESERVED.code,
+        borrower=borrower,
+        due_back=None,
+    ):
+        raise CirculationError(CIRCULATION_NOT_AVAILABLE_ERROR)
+    return copy_id
+
+
+def _allocate(copies_by_book):
+    """
+    Reserve freshly available copies, ``{book_id: [copy_id, ...]}``, for
+    the patrons at the head of each book's queue, oldest hold first. Must
+    run in the transaction that made the copies available. Returns the
+    fulfilled holds as ``{hold_id: copy_id}``.
+    """
+    copies_by_book = {
+        book_id: copies for book_id, copies in copies_by_book.items() if copies
+    }
+    if not copies_by_book:
+        return {}
+    # Two returns of the same title must not both hand their copy to the
+    # head of its queue, so allocation is serialised per book.
+    list(
+        Book.objects.select_for_update().filter(
+            pk__in=copies_by_book,
+        ).order_by('pk').values_list('pk', flat=True),
+    )
+    # ROW_NUMBER() picks the first few holds of every queue in one query
+    # however long the queues are.
+    heads = Hold.objects.waiting().filter(
+        book_id__in=copies_by_book,
+    ).with_position().filter(
+        position__lte=max(len(copies) for copies in copies_by_book.values()),
+    ).order_by('book_id', 'created_at', 'id').values_list(
+        'pk',
+        'book_id',
+        'patron_id',
+    )
+    queues = defaultdict(list)
+    for hold_id, book_id, patron_id in heads:
+        queues[book_id].append((hold_id, patron_id))
+    allocations = [
+        (copy_id, hold_id, patron_id)
+        for book_id, queue in queues.items()
+        for copy_id, (hold_id, patron_id) in zip(
+            copies_by_book[book_id],
+            queue,
+        )
+    ]
+    if not allocations:
+        return {}
+
+    now = timezone.now()
+    BookInstance.objects.filter(
+        pk__in=[copy_id for copy_id, _, _ in allocations],
+    ).update(
+        status=LoanStatusEnum.RESERVED.code,
+        borrower=Case(*(
+            When(pk=copy_id, then=Value(patron_id))
+            for copy_id, _, patron_id in allocations
+        )),
+        due_back=datetime.date.today() + datetime.timedelta(
+            days=HOLD_PICKUP_DAYS,
+        ),
+        updated_at=now,
+    )
+    Hold.objects.filter(
+        pk__in=[hold_id for _, hold_id, _ in allocations],
+    ).update(
+        copy=Case(*(
+            When(pk=hold_id, then=Value(copy_id, output_field=UUIDField()))
+            for copy_id, hold_id, _ in allocations
+        )),
+        fulfilled_at=now,
+        updated_at=now,
+    )
+    _record(queues, -len(allocations))
+    return {hold_id: copy_id for copy_id, hold_id, _ in allocations}
+
+
+def place_hold(book_id, patron):
+    """
+    Queue ``patron`` for a book, or return their hold if they are already
+    waiting. A copy left on the shelf is allocated straight away.
+    """
+    with transaction.atomic():
+        hold, created = Hold.objects.get_or_create(
+            book_id=book_id,
+            patron=patron,
+            fulfilled_at=None,
+        )
+        if created:
+            connection = connections[router.db_for_write(BookInstance)]
+            features = connection.features
+            copies = BookInstance.objects.filter(
+                book_id=book_id,
+                status=LoanStatusEnum.AVAILABLE.code,
+            ).order_by().select_for_update(
+                skip_locked=features.has_select_for_update_skip_locked,
+            )
+            _allocate({
+                book_id: list(
+                    copies.values_list('pk', flat=True)[
+                        :CIRCULATION_CANDIDATES
+                    ],
+                ),
+            })
+            hold.refresh_from_db()
+    return hold
+
+
+def _release(condition):
+    """
+    Put the reserved copies matching ``condition`` back on the shelf,
+    closing the holds they were reserved for, and hand them to the
+    patrons queued for their books. Must run in a transaction. Returns
+    how many copies were released.
+    """
+    result, copies_by_book = BulkResult(), defaultdict(list)
+    for pk, book_id in BookInstance.objects.select_for_update().filter(
+        condition,
+        status=LoanStatusEnum.RESERVED.code,
+    ).order_by().values_list('pk', 'book_id'):
+        result.updated.append(pk)
+        copies_by_book[book_id].append(pk)
+    if result.updated:
+        _apply(
+            result,
+            copies_by_book,
+            available_delta=len(result.updated),
+            status=LoanStatusEnum.AVAILABLE.code,
+            due_back=None,
+            borrower=None,
+        )
+        Hold.objects.filter(copy__in=result.updated).delete()
+        _allocate(copies_by_book)
+    return len(result.updated)
+
+
+def expire_reservations():
+    """
+    Release the copies whose holders missed their pickup date, so they go
+    to the next patron in the queue. Copies reserved by hand have no
+    pickup date and never expire. Returns how many copies were released.
+    """
+    with transaction.atomic():
+        return _release(Q(due_back__lt=datetime.date.today()))
+
+
+def cancel_hold(hold_id, patron):
+    """
+    Leave a queue, or give up the copy a fulfilled hold reserved, which
+    then goes to the next patron in the queue. Returns whether ``patron``
+    had that hold to cancel.
+    """
+    with transaction.atomic():
+        hold = Hold.objects.select_for_update().filter(
+            pk=hold_id,
+            patron=patron,
+        ).first()
+        if hold is None:
+            return False
+        if hold.fulfilled_at is None:
+            hold.delete()
+            return True
+        # Releasing the copy closes the hold. Once the copy is collected
+        # there is nothing left to cancel.
+        return bool(_release(Q(pk=hold.copy_id, borrower=patron)))
+
+
+def queue_positions(patron):
+    """
+    The waiting holds of ``patron``, each with its ``position`` in the
+    book's queue. The window has to rank whole queues before the patron's
+    rows are picked out, so the ranked query is wrapped in an outer one
+    that filters on the patron.
+    """
+    ranked = Hold.objects.waiting().filter(
+        book__in=Hold.objects.waiting().filter(patron=patron).values('book'),
+    ).with_position().order_by().values('id', 'position')
+    sql, params = ranked.query.sql_with_params()
+    connection = connections[router.db_for_read(Hold)]
+    table = connection.ops.quote_name(Hold._meta.db_table)
+    return Hold.objects.raw(
+        f'SELECT hold.*, ranked.position FROM ({sql}) ranked '
+        f'INNER JOIN {table} hold ON hold.id = ranked.id '
+        'WHERE hold.patron_id = %s ORDER BY hold.created_at, hold.id',
+        (*params, patron.pk),
+    ).prefetch_related('book')
@@ -31,9 +31,99 @@ BOOK_INSTANCE_UNIQUE_ID_HELP_TEXT = _(
 )
 BOOK_INSTANCE_STATUS_HELP_TEXT = _('Book availability')
 
+# Library statistics constants
+LIBRARY_STATS_PK = 1
+
+# Cache constants
+CACHE_KEY_PREFIX = 'catalog'
+BOOK_DETAIL_CACHE_TIMEOUT = 60 * 60
+QUERY_CACHE_TIMEOUT = 60 * 60
+QUERY_CACHE_LOCAL_ENTRIES = 256
+# How long other processes wait for the one computing a missing value.
+QUERY_CACHE_LOCK_TIMEOUT = 10
+QUERY_CACHE_POLL_INTERVAL = 0.05
+
+# Benchmark constants
+BENCHMARK_SIZES = (10_000, 100_000, 1_000_000)
+BENCHMARK_ROUNDS = 10
+BENCHMARK_URL_KWARGS = {
+    'dataset': 'loans',
+    'fmt': 'csv',
+}
+# POST-only routes cannot be timed with plain GET requests.
+BENCHMARK_POST_ONLY_URLS = (
+    'place-hold',
+    'cancel-hold',
+    'bulk-renew-librarian',
+    'bulk-return-librarian',
+)
+
+# Search constants
+SEARCH_INDEX_TABLE = 'catalog_book_fts'
+SEARCH_INDEX_CHUNK_SIZE = 2000
+SEARCH_PG_CONFIG = 'simple'
+SEARCH_QUERY_PARAM = 'q'
+
+# Visit tracking constants
+VISITS_SESSION_KEY = 'num_visits'
+VISITS_COOKIE_NAME = 'num_visits'
+VISITS_COOKIE_SALT = 'catalog.visits'
+VISITS_COOKIE_MAX_AGE = 60 * 60 * 24 * 365
+
+# Read replica constants
+REPLICA_PIN_COOKIE_NAME = 'catalog_primary'
+
+# Session cleanup constants
+SESSION_PURGE_BATCH_SIZE = 1000
+
+# Import constants
+IMPORT_BATCH_SIZE = 5000
+IMPORT_GENRE_SEPARATOR = '|'
+
+# Export constants
+EXPORT_CHUNK_SIZE = 2000
+
+# JSON API constants
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+API_FIELDS_PARAM = 'fields'
+API_LIMIT_PARAM = 'limit'
+
+# Request metrics constants
+REQUEST_METRICS_QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+REQUEST_METRICS_SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+)
+REQUEST_METRICS = {
+    'catalog_request_queries': (
+        'SQL queries issued per request.',
+        REQUEST_METRICS_QUERY_BUCKETS,
+    ),
+    'catalog_request_sql_seconds': (
+        'Total SQL execution time per request.',
+        REQUEST_METRICS_SECONDS_BUCKETS,
+    ),
+    'catalog_request_view_seconds': (
+        'Time spent in the view, excluding template rendering.',
+        REQUEST_METRICS_SECONDS_BUCKETS,
+    ),
+    'catalog_request_render_seconds': (
+        'Time spent rendering the template response.',
+        REQUEST_METRICS_SECONDS_BUCKETS,
+    ),
+}
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
 # Pagination constants
 BOOKS_PER_PAGE = 10
 BORROWED_BOOKS_PER_PAGE = 10
+OVERDUE_LOANS_PER_PAGE = 20
+KEYSET_CURSOR_PARAM = 'cursor'
+KEYSET_CURSOR_SALT = 'catalog.pagination.cursor'
+# Admin change forms edit inline rows one page at a time.
+INLINE_PER_PAGE = 20
+# Changelists count exactly up to this many rows, then estimate.
+ESTIMATED_COUNT_THRESHOLD = 10_000
 
 # Form constants
 RENEWAL_DATE_LABEL = _('Renewal date')
@@ -43,6 +133,17 @@ RENEWAL_DATE_HELP_TEXT = _(
 RENEWAL_DATE_PAST_ERROR = _('Invalid date - renewal in past')
 RENEWAL_DATE_FUTURE_ERROR = _('Invalid date - renewal more than 4 weeks ahead')
 
+# Circulation constants
+CIRCULATION_NOT_FOUND_ERROR = _('Copy not found.')
+CIRCULATION_NOT_ON_LOAN_ERROR = _('Copy is not on loan.')
+BULK_COPIES_INVALID_ERROR = _('Enter valid copy IDs.')
+CIRCULATION_NOT_AVAILABLE_ERROR = _('Copy is not available.')
+CIRCULATION_NO_COPIES_ERROR = _('No copy of this book is available.')
+CIRCULATION_LOAN_WEEKS = 3
+CIRCULATION_CANDIDATES = 8
+# Days a copy allocated to a hold waits on the shelf for its patron.
+HOLD_PICKUP_DAYS = 7
+
 # Author constants for templates
 AUTHOR_FORM_SUBMIT = _('Submit')
 AUTHOR_DELETE_TITLE = _('Delete Author')
@@ -82,3 +183,27 @@ class LoanStatusEnum(Enum):
     @classmethod
     def choices(cls):
         return [(item.code, item.label) for item in cls]
+
+
+class VisitTrackingEnum(Enum):
+    SESSION = 'session'
+    COOKIE = 'cookie'
+
+
+# Synthetic data constants
+SEED_BATCH_SIZE = 5000
+SEED_STATUS_WEIGHTS = {
+    LoanStatusEnum.ON_LOAN: 70,
+    LoanStatusEnum.AVAILABLE: 15,
+    LoanStatusEnum.MAINTENANCE: 10,
+    LoanStatusEnum.RESERVED: 5,
+}
+
+# Static file constants
+STATIC_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+STATIC_MAX_AGE = 60 * 60
+STATIC_COMPRESS_SUFFIXES = (
+    '.css', '.js', '.json', '.map', '.svg', '.txt', '.xml', '.html',
+)
+# Precompressed variants, in order of preference.
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
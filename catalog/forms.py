@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import datetime
+import uuid
 
 from django import forms
 from django.core.exceptions import ValidationError
 
+from catalog.constants import BULK_COPIES_INVALID_ERROR
 from catalog.constants import RENEWAL_DATE_FUTURE_ERROR
 from catalog.constants import RENEWAL_DATE_HELP_TEXT
 from catalog.constants import RENEWAL_DATE_LABEL
@@ -33,6 +35,27 @@ class RenewBookForm(forms.Form):
         return data
 
 
+class CopyIdsField(forms.Field):
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        if not value:
+            return []
+        try:
+            ids = [uuid.UUID(str(item)) for item in value]
+        except ValueError:
+            raise ValidationError(BULK_COPIES_INVALID_ERROR, code='invalid')
+        return list(dict.fromkeys(ids))
+
+
+class BulkReturnForm(forms.Form):
+    copies = CopyIdsField()
+
+
+class BulkRenewForm(RenewBookForm):
+    copies = CopyIdsField()
+
+
 class AuthorModelForm(forms.ModelForm):
     class Meta:
         model = Author
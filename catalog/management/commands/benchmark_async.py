@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from django.test.utils import setup_test_environment
+from django.test.utils import teardown_test_environment
+from django.utils import translation
+
+from catalog import async_views
+from catalog import views
+from catalog.benchmarks import analyze
+from catalog.benchmarks import asgi_throughput
+from catalog.benchmarks import read_urlconf
+from catalog.benchmarks import read_urls
+from catalog.benchmarks import sample_objects
+from catalog.benchmarks import wsgi_throughput
+from catalog.seeding import seed_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database and compare requests per second '
+        'of the sync catalog views under WSGI with the async views under '
+        'ASGI.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--instances',
+            type=int,
+            default=10_000,
+            help='Number of BookInstance rows to seed (default: %(default)s).',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Requests per URL and handler (default: %(default)s).',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=10,
+            help='Concurrent clients per handler (default: %(default)s).',
+        )
+
+    def handle(self, *args, **options):
+        verbosity = max(options['verbosity'] - 1, 0)
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(
+            verbosity=verbosity,
+            autoclobber=True,
+        )
+        try:
+            with translation.override(settings.LANGUAGES[0][0]):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+            teardown_test_environment()
+
+    def run(self, options):
+        started = time.perf_counter()
+        seed_catalog(options['instances'])
+        analyze()
+        self.stdout.write(
+            f'Seeded {options["instances"]} copies in '
+            f'{time.perf_counter() - started:.1f}s.',
+        )
+        samples = sample_objects()
+        requests, concurrency = options['requests'], options['concurrency']
+
+        self.stdout.write(
+            f'{"url":<16}{"wsgi req/s":>12}{"asgi req/s":>12}{"ratio":>8}',
+        )
+        for name, url in read_urls(samples, views):
+            with override_settings(ROOT_URLCONF=read_urlconf(views)):
+                wsgi_rps, wsgi_status = wsgi_throughput(
+                    url,
+                    requests,
+                    concurrency,
+                )
+            with override_settings(ROOT_URLCONF=read_urlconf(async_views)):
+                asgi_rps, asgi_status = asyncio.run(
+                    asgi_throughput(url, requests, concurrency),
+                )
+            line = (
+                f'{name:<16}{wsgi_rps:>12.1f}{asgi_rps:>12.1f}'
+                f'{asgi_rps / wsgi_rps:>8.2f}'
+            )
+            if wsgi_status | asgi_status != {200}:
+                line = self.style.ERROR(
+                    f'{line}  status {sorted(wsgi_status | asgi_status)}',
+                )
+            self.stdout.write(line)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime
+from datetime import timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.test.utils import teardown_test_environment
+from django.utils import translation
+
+from catalog.benchmarks import analyze
+from catalog.benchmarks import benchmark_url
+from catalog.benchmarks import catalog_urls
+from catalog.benchmarks import sample_objects
+from catalog.constants import BENCHMARK_ROUNDS
+from catalog.constants import BENCHMARK_SIZES
+from catalog.seeding import seed_catalog
+
+
+def commit_info():
+    def git(*args):
+        return subprocess.run(
+            ['git', *args],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+
+    return {
+        'id': git('rev-parse', 'HEAD') or None,
+        'branch': git('rev-parse', '--abbrev-ref', 'HEAD') or None,
+        'dirty': bool(git('status', '--porcelain')),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed synthetic catalogs of increasing size in a throwaway test '
+        'database and time every catalog URL against each of them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=list(BENCHMARK_SIZES),
+            help='BookInstance counts to benchmark (default: %(default)s).',
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=BENCHMARK_ROUNDS,
+            help='Timed requests per URL (default: %(default)s).',
+        )
+        parser.add_argument(
+            '--skip',
+            nargs='*',
+            default=[],
+            metavar='URL_NAME',
+            help='URL names to leave out, e.g. catalog-export.',
+        )
+        parser.add_argument(
+            '--clear-cache',
+            action='store_true',
+            help='Clear the cache before every request to time cold paths.',
+        )
+        parser.add_argument(
+            '--output',
+            default='benchmark.json',
+            help='JSON results file (default: %(default)s).',
+        )
+
+    def handle(self, *args, **options):
+        verbosity = max(options['verbosity'] - 1, 0)
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(
+            verbosity=verbosity,
+            autoclobber=True,
+        )
+        try:
+            with translation.override(settings.LANGUAGES[0][0]):
+                benchmarks = [
+                    result
+                    for size in options['sizes']
+                    for result in self.run(size, options)
+                ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+            teardown_test_environment()
+
+        report = {
+            'machine_info': {
+                'node': platform.node(),
+                'machine': platform.machine(),
+                'python_version': platform.python_version(),
+                'django_version': django.get_version(),
+                'database': connection.vendor,
+            },
+            'commit_info': commit_info(),
+            'datetime': datetime.now(timezone.utc).isoformat(),
+            'benchmarks': benchmarks,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        self.stdout.write(
+            self.style.SUCCESS(f'Wrote {len(benchmarks)} results to '
+                               f'{options["output"]}.'),
+        )
+
+    def run(self, size, options):
+        call_command('flush', interactive=False, verbosity=0)
+        started = time.perf_counter()
+        seed_catalog(size)
+        analyze()
+        self.stdout.write(
+            f'Seeded {size} copies in {time.perf_counter() - started:.1f}s',
+        )
+
+        client = Client()
+        client.force_login(
+            User.objects.create_superuser('benchmark', password=None),
+        )
+        for name, url in catalog_urls(sample_objects()):
+            if name in options['skip']:
+                continue
+            stats, extra = benchmark_url(
+                client,
+                url,
+                options['rounds'],
+                clear_cache=options['clear_cache'],
+            )
+            self.stdout.write(
+                f'  {name:<24} median {stats["median"] * 1000:8.2f} ms  '
+                f'{extra["queries"]:4d} queries  '
+                f'{extra["peak_memory_bytes"] / 1024:10.0f} KiB  '
+                f'[{extra["status_code"]}]',
+            )
+            yield {
+                'name': f'{name}[{size}]',
+                'group': name,
+                'params': {'instances': size},
+                'stats': stats,
+                'extra_info': extra,
+            }
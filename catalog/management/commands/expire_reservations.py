@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from catalog.circulation import expire_reservations
+
+
+class Command(BaseCommand):
+    help = (
+        'Release copies reserved for holds that were not collected by '
+        'their pickup date and pass them on to the next patron queued. '
+        'Run it daily, e.g. from cron.'
+    )
+
+    def handle(self, *args, **options):
+        released = expire_reservations()
+        self.stdout.write(
+            self.style.SUCCESS(f'Released {released} expired reservations.'),
+        )
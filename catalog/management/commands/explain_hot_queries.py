@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+
+from catalog.benchmarks import analyze
+from catalog.benchmarks import explain_hot_queries
+from catalog.seeding import seed_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database with a large catalog and check '
+        'through EXPLAIN that every hot BookInstance query uses an index.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--instances',
+            type=int,
+            default=100_000,
+            help='Number of BookInstance rows to seed (default: %(default)s).',
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Keep the seeded test database between runs.',
+        )
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=max(verbosity - 1, 0),
+            autoclobber=True,
+            keepdb=options['keepdb'],
+        )
+        try:
+            self.run(options['instances'])
+        finally:
+            connection.creation.destroy_test_db(
+                old_name,
+                verbosity=max(verbosity - 1, 0),
+                keepdb=options['keepdb'],
+            )
+
+    def run(self, instances):
+        started = time.perf_counter()
+        seed_catalog(instances)
+        analyze()
+        self.stdout.write(
+            f'Seeded {instances} copies in '
+            f'{time.perf_counter() - started:.1f}s.',
+        )
+
+        try:
+            results = explain_hot_queries()
+        except ValueError as e:
+            raise CommandError(str(e))
+        failures = []
+        for name, plan, uses_index in results:
+            style = self.style.SUCCESS if uses_index else self.style.ERROR
+            verdict = 'index' if uses_index else 'SCAN'
+            self.stdout.write(style(f'[{verdict}] {name}'))
+            for line in plan.splitlines():
+                self.stdout.write(f'    {line}')
+            if not uses_index:
+                failures.append(name)
+        if failures:
+            raise CommandError(
+                'Hot queries without index support: ' + ', '.join(failures),
+            )
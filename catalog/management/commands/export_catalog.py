@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from catalog.exports import EXPORT_FORMATS
+from catalog.exports import EXPORTS
+from catalog.exports import stream_export
+
+
+class Command(BaseCommand):
+    help = 'Stream a catalog dataset as CSV or NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(EXPORTS))
+        parser.add_argument(
+            '--format',
+            choices=sorted(EXPORT_FORMATS),
+            default='csv',
+        )
+        parser.add_argument(
+            '--output',
+            metavar='FILE',
+            help='Write to FILE instead of standard output.',
+        )
+
+    def handle(self, *args, **options):
+        lines = stream_export(options['dataset'], options['format'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(
+            options['output'], 'w', newline='', encoding='utf-8',
+        ) as handle:
+            handle.writelines(lines)
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from catalog.caching import mark_books_changed
+from catalog.caching import mark_models_changed
+from catalog.constants import BOOK_ISBN_MAX_LENGTH
+from catalog.constants import IMPORT_BATCH_SIZE
+from catalog.constants import IMPORT_GENRE_SEPARATOR
+from catalog.constants import LoanStatusEnum
+from catalog.models import Author
+from catalog.models import Book
+from catalog.models import BookInstance
+from catalog.models import Genre
+from catalog.models import Language
+from catalog.models import LibraryStats
+from catalog.search import index_books
+
+STATUS_CODES = {status.code for status in LoanStatusEnum}
+
+
+def read_records(path):
+    path = Path(path)
+    suffix = path.suffix.lower()
+    with path.open(newline='', encoding='utf-8') as handle:
+        if suffix == '.csv':
+            yield from csv.DictReader(handle)
+        elif suffix in ('.ndjson', '.jsonl'):
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise CommandError(
+                f'{path}: expected a .csv, .ndjson or .jsonl file.',
+            )
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def clean(value):
+    return (value or '').strip()
+
+
+def optional_date(value):
+    """
+    Parse an optional ISO date. parse_date() returns None for a malformed
+    date but raises ValueError for an impossible one such as 2030-13-01;
+    both raise ValueError here, so the caller can skip the record.
+    """
+    value = clean(value)
+    if not value:
+        return None
+    date = parse_date(value)
+    if date is None:
+        raise ValueError(f'Invalid date: {value!r}')
+    return date
+
+
+def genre_names(value):
+    if isinstance(value, list):
+        names = value
+    else:
+        names = clean(value).split(IMPORT_GENRE_SEPARATOR)
+    return [clean(name) for name in names if clean(name)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream authors, genres, languages, books and copies from CSV or '
+        'NDJSON files into the catalog with batched inserts.'
+    )
+
+    def add_arguments(self, parser):
+        for name in ('authors', 'genres', 'languages', 'books', 'copies'):
+            parser.add_argument(
+                f'--{name}',
+                metavar='FILE',
+                help=f'CSV or NDJSON file of {name}.',
+            )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Rows per INSERT batch (default: %(default)s).',
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        self.batch_size = options['batch_size']
+        if self.batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        steps = [
+            ('languages', self.import_languages),
+            ('genres', self.import_genres),
+            ('authors', self.import_authors),
+            ('books', self.import_books),
+            ('copies', self.import_copies),
+        ]
+        if not any(options[name] for name, _ in steps):
+            raise CommandError('Nothing to import: pass at least one file.')
+
+        self.languages = dict(Language.objects.values_list('name', 'pk'))
+        self.genres = dict(Genre.objects.values_list('name', 'pk'))
+        self.authors = dict(Author.objects.values_list('name', 'pk'))
+        self.books = dict(Book.objects.values_list('ISBN', 'pk'))
+        self.users = None
+
+        for name, step in steps:
+            if options[name]:
+                started = time.perf_counter()
+                created, skipped = step(read_records(options[name]))
+                self.report(name, created, skipped, started)
+
+        LibraryStats.rebuild()
+        mark_models_changed([Language, Genre, Author, Book, BookInstance])
+
+    def report(self, name, created, skipped, started):
+        elapsed = time.perf_counter() - started
+        rate = created / elapsed if elapsed else float(created)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{name}: {created} created, {skipped} skipped in '
+                f'{elapsed:.1f}s ({rate:,.0f} rows/s)',
+            ),
+        )
+
+    def progress(self, name, count):
+        if self.verbosity > 1:
+            self.stdout.write(f'  {name}: {count} rows written')
+
+    def import_named(self, model, mapping, records):
+        created = skipped = 0
+        for batch in batched(records, self.batch_size):
+            names = []
+            for record in batch:
+                name = clean(record.get('name'))
+                if not name or name in mapping or name in names:
+                    skipped += 1
+                    continue
+                names.append(name)
+            created += len(self.create_named(model, mapping, names))
+        return created, skipped
+
+    def create_named(self, model, mapping, names, defaults=None):
+        defaults = defaults or {}
+        objs = model.objects.bulk_create(
+            [model(name=name, **defaults.get(name, {})) for name in names],
+            batch_size=self.batch_size,
+        )
+        for obj in objs:
+            mapping[obj.name] = obj.pk
+        return objs
+
+    def resolve_names(self, model, mapping, names):
+        missing = list(dict.fromkeys(n for n in names if n not in mapping))
+        if missing:
+            self.create_named(model, mapping, missing)
+
+    def import_languages(self, records):
+        return self.import_named(Language, self.languages, records)
+
+    def import_genres(self, records):
+        return self.import_named(Genre, self.genres, records)
+
+    def import_authors(self, records):
+        created = skipped = 0
+        for batch in batched(records, self.batch_size):
+            dates = {}
+            for record in batch:
+                name = clean(record.get('name'))
+                if not name or name in self.authors or name in dates:
+                    skipped += 1
+                    continue
+                try:
+                    dates[name] = {
+                        'date_of_birth': optional_date(
+                            record.get('date_of_birth'),
+                        ),
+                        'date_of_death': optional_date(
+                            record.get('date_of_death'),
+                        ),
+                    }
+                except ValueError:
+                    skipped += 1
+            created += len(
+                self.create_named(Author, self.authors, list(dates), dates),
+            )
+        return created, skipped
+
+    def import_books(self, records):
+        Through = Book.genre.through
+        created = skipped = 0
+        for batch in batched(records, self.batch_size):
+            rows = []
+            for record in batch:
+                isbn = clean(record.get('isbn') or record.get('ISBN'))
+                if not isbn or len(isbn) > BOOK_ISBN_MAX_LENGTH or \
+                        isbn in self.books:
+                    skipped += 1
+                    continue
+                self.books[isbn] = None
+                rows.append((isbn, record))
+
+            with transaction.atomic():
+                self.resolve_names(
+                    Author, self.authors,
+                    [clean(r.get('author')) for _, r in rows
+                     if clean(r.get('author'))],
+                )
+                self.resolve_names(
+                    Language, self.languages,
+                    [clean(r.get('language')) for _, r in rows
+                     if clean(r.get('language'))],
+                )
+                self.resolve_names(
+                    Genre, self.genres,
+                    [g for _, r in rows for g in genre_names(r.get('genre'))],
+                )
+                books = Book.objects.bulk_create([
+                    Book(
+                        title=clean(record.get('title')),
+                        summary=clean(record.get('summary')),
+                        ISBN=isbn,
+                        author_id=self.authors.get(
+                            clean(record.get('author')),
+                        ),
+                        language_id=self.languages.get(
+                            clean(record.get('language')),
+                        ),
+                    )
+                    for isbn, record in rows
+                ], batch_size=self.batch_size)
+                links = []
+                for book, (_, record) in zip(books, rows):
+                    self.books[book.ISBN] = book.pk
+                    links.extend(
+                        Through(book_id=book.pk, genre_id=self.genres[name])
+                        for name in dict.fromkeys(
+                            genre_names(record.get('genre')),
+                        )
+                    )
+                Through.objects.bulk_create(links, batch_size=self.batch_size)
+                index_books(book.pk for book in books)
+            created += len(books)
+            self.progress('books', created)
+        return created, skipped
+
+    def borrower_id(self, username):
+        if not username:
+            return None
+        if self.users is None:
+            self.users = dict(User.objects.values_list('username', 'pk'))
+        return self.users.get(username)
+
+    def import_copies(self, records):
+        created = skipped = 0
+        for batch in batched(records, self.batch_size):
+            copies = []
+            for record in batch:
+                book_id = self.books.get(
+                    clean(record.get('isbn') or record.get('ISBN')),
+                )
+                status = clean(record.get('status')) or \
+                    LoanStatusEnum.MAINTENANCE.code
+                if book_id is None or status not in STATUS_CODES:
+                    skipped += 1
+                    continue
+                try:
+                    due_back = optional_date(record.get('due_back'))
+                except ValueError:
+                    skipped += 1
+                    continue
+                copies.append(
+                    BookInstance(
+                        book_id=book_id,
+                        imprint=clean(record.get('imprint')),
+                        status=status,
+                        due_back=due_back,
+                        borrower_id=self.borrower_id(
+                            clean(record.get('borrower')),
+                        ),
+                    ),
+                )
+            with transaction.atomic():
+                BookInstance.objects.bulk_create(
+                    copies,
+                    batch_size=self.batch_size,
+                )
+                mark_books_changed({copy.book_id for copy in copies})
+            created += len(copies)
+            self.progress('copies', created)
+        return created, skipped
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from catalog.constants import SESSION_PURGE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired database-backed sessions in small batches so the '
+        'session table is never locked by one large DELETE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SESSION_PURGE_BATCH_SIZE,
+            help='Rows deleted per statement (default: %(default)s).',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Seconds to sleep between batches (default: %(default)s).',
+        )
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, 'get_model_class'):
+            # Cache and signed-cookie sessions expire on their own.
+            store.clear_expired()
+            self.stdout.write('Session engine has no table to purge.')
+            return
+
+        model = store.get_model_class()
+        now = timezone.now()
+        deleted = 0
+        while True:
+            keys = list(
+                model.objects.filter(
+                    expire_date__lt=now,
+                ).values_list('pk', flat=True)[:options['batch_size']],
+            )
+            if not keys:
+                break
+            deleted += model.objects.filter(pk__in=keys).delete()[0]
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Deleted {deleted} expired sessions.'),
+        )
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from catalog.models import LibraryStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the library statistics shown on the catalog index.'
+
+    def handle(self, *args, **options):
+        stats = LibraryStats.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rebuilt library statistics: {stats.num_books} books, '
+                f'{stats.num_instances} copies '
+                f'({stats.num_instances_available} available), '
+                f'{stats.num_authors} authors.',
+            ),
+        )
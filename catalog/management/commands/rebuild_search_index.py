@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from catalog.search import get_search_backend
+from catalog.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Drop and repopulate the catalog full-text search index.'
+
+    def handle(self, *args, **options):
+        rebuild_search_index()
+        backend = get_search_backend().__class__.__name__
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt search index using {backend}.'),
+        )
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from catalog.warmup import PHASES
+from catalog.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        'Load models, translations, URL resolvers, templates and database '
+        'drivers ahead of the first request and report each phase.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'phases',
+            nargs='*',
+            metavar='PHASE',
+            help=f'Phases to run (default: all of {", ".join(PHASES)}).',
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['phases']) - set(PHASES)
+        if unknown:
+            raise CommandError(
+                f'Unknown phases: {", ".join(sorted(unknown))}.',
+            )
+        total = 0.0
+        for phase, elapsed, detail in warm_up(options['phases']):
+            total += elapsed
+            self.stdout.write(
+                f'  {phase:<14} {elapsed * 1000:8.1f} ms  {detail}',
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Warmed up in {total * 1000:.1f} ms.'),
+        )
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+
+from catalog.constants import REQUEST_METRICS
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """
+    In-process per-view histograms. Each worker process keeps its own
+    registry; Prometheus aggregates across workers when scraping them.
+    """
+
+    def __init__(self, metrics=REQUEST_METRICS):
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, view, **values):
+        with self._lock:
+            for name, value in values.items():
+                histogram = self._histograms.get((name, view))
+                if histogram is None:
+                    histogram = self._histograms[(name, view)] = Histogram(
+                        self.metrics[name][1],
+                    )
+                histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (help_text, _) in self.metrics.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (metric, view), histogram in sorted(
+                    self._histograms.items(),
+                ):
+                    if metric != name:
+                        continue
+                    label = f'view="{view}"'
+                    for bound, total in histogram.cumulative():
+                        le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                        lines.append(
+                            f'{name}_bucket{{{label},le="{le}"}} {total}',
+                        )
+                    lines.append(f'{name}_sum{{{label}}} {histogram.sum:g}')
+                    lines.append(f'{name}_count{{{label}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
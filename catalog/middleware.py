@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import mimetypes
+import os
+from contextlib import ExitStack
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse
+from django.http import HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from catalog.constants import REPLICA_PIN_COOKIE_NAME
+from catalog.constants import STATIC_ENCODINGS
+from catalog.constants import STATIC_IMMUTABLE_MAX_AGE
+from catalog.constants import STATIC_MAX_AGE
+from catalog.metrics import registry
+from catalog.replicas import read_replicas
+from catalog.replicas import routing_state
+
+
+class QueryTracker:
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += perf_counter() - start
+
+
+def track_queries(tracker):
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(tracker))
+    return stack
+
+
+async def read_chunks(file, chunk_size):
+    read = sync_to_async(file.read, thread_sensitive=False)
+    while chunk := await read(chunk_size):
+        yield chunk
+
+
+class AsyncCapableMiddleware:
+    """
+    Base for middleware that runs natively in both modes: ``__call__``
+    serves sync requests and ``__acall__`` async ones, so an async stack
+    never switches threads here.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+
+class RequestMetricsMiddleware(AsyncCapableMiddleware):
+    """
+    Record query count, SQL time, view time and template render time per
+    resolved URL name. Render time is only separated from view time for
+    views returning a TemplateResponse (every class-based view).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'CATALOG_REQUEST_METRICS', True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tracker = QueryTracker()
+        with track_queries(tracker):
+            response = self.get_response(request)
+        self.observe(request, tracker)
+        return response
+
+    async def __acall__(self, request):
+        tracker = QueryTracker()
+        # Connections are thread-local: async requests query from the
+        # thread sync_to_async() runs thread-sensitive code in.
+        queries = await sync_to_async(track_queries)(tracker)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(queries.close)()
+        self.observe(request, tracker)
+        return response
+
+    def observe(self, request, tracker):
+        finished = perf_counter()
+        view_started = getattr(request, '_metrics_view_started', None)
+        if view_started is None:
+            return
+        render_started = getattr(request, '_metrics_render_started', None)
+        render_finished = getattr(request, '_metrics_render_finished', None)
+        if render_started is not None and render_finished is not None:
+            view_seconds = render_started - view_started
+            render_seconds = render_finished - render_started
+        else:
+            view_seconds = finished - view_started
+            render_seconds = 0.0
+
+        registry.observe(
+            request.resolver_match.url_name or 'unnamed',
+            catalog_request_queries=tracker.queries,
+            catalog_request_sql_seconds=tracker.seconds,
+            catalog_request_view_seconds=view_seconds,
+            catalog_request_render_seconds=render_seconds,
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view_started = perf_counter()
+
+    def process_template_response(self, request, response):
+        request._metrics_render_started = perf_counter()
+
+        def render_finished(response):
+            request._metrics_render_finished = perf_counter()
+
+        response.add_post_render_callback(render_finished)
+        return response
+
+
+class ReplicaRoutingMiddleware(AsyncCapableMiddleware):
+    """
+    Route the reads of ReplicaReadMixin views to the read replicas, and
+    pin a client to the primary for CATALOG_REPLICA_PIN_SECONDS after a
+    request of theirs wrote, so they always read their own writes.
+    """
+
+    def __init__(self, get_response):
+        if not read_replicas():
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with routing_state() as state:
+            request._routing_state = state
+            response = self.get_response(request)
+        return self.pin(request, state, response)
+
+    async def __acall__(self, request):
+        with routing_state() as state:
+            request._routing_state = state
+            response = await self.get_response(request)
+        return self.pin(request, state, response)
+
+    def pin(self, request, state, response):
+        if state.wrote and request.method not in ('GET', 'HEAD'):
+            response.set_cookie(
+                REPLICA_PIN_COOKIE_NAME,
+                '1',
+                max_age=settings.CATALOG_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if getattr(view_class, 'read_from_replica', False) and \
+                request.method in ('GET', 'HEAD') and \
+                REPLICA_PIN_COOKIE_NAME not in request.COOKIES:
+            request._routing_state.enable_replica_reads()
+
+
+def accepted_encodings(header):
+    encodings = set()
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        quality = params.strip().removeprefix('q=')
+        try:
+            if params and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        encodings.add(coding.strip().lower())
+    return encodings
+
+
+class StaticFilesMiddleware(AsyncCapableMiddleware):
+    """
+    Serve files collected into STATIC_ROOT before any other middleware
+    runs, preferring the precompressed .br or .gz variant the client
+    accepts. Hashed names from the manifest never change content, so
+    they are cached as immutable. FileResponse hands the open file to
+    the server's wsgi.file_wrapper, which sends it with sendfile();
+    under ASGI the file is read in a worker thread instead.
+    """
+
+    def __init__(self, get_response):
+        if not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.prefix = settings.STATIC_URL
+        self.hashed_names = set(
+            getattr(staticfiles_storage, 'hashed_files', {}).values(),
+        )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        name = self.static_name(request)
+        if name is not None:
+            response = self.serve(request, name)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        name = self.static_name(request)
+        if name is not None:
+            response = await sync_to_async(
+                self.serve,
+                thread_sensitive=False,
+            )(request, name)
+            if response is not None:
+                if response.streaming:
+                    response.streaming_content = read_chunks(
+                        response.file_to_stream,
+                        response.block_size,
+                    )
+                return response
+        return await self.get_response(request)
+
+    def static_name(self, request):
+        if request.method in ('GET', 'HEAD') and \
+                request.path_info.startswith(self.prefix):
+            return request.path_info.removeprefix(self.prefix)
+        return None
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        try:
+            stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not os.path.isfile(path):
+            return None
+        if not was_modified_since(
+            request.headers.get('If-Modified-Since'),
+            stat.st_mtime,
+        ):
+            return self.patch_headers(HttpResponseNotModified(), name, stat)
+
+        served, encoding = path, None
+        accepted = accepted_encodings(
+            request.headers.get('Accept-Encoding', ''),
+        )
+        for candidate, suffix in STATIC_ENCODINGS:
+            if candidate in accepted and os.path.isfile(path + suffix):
+                served, encoding = path + suffix, candidate
+                break
+
+        content_type, _ = mimetypes.guess_type(name)
+        response = FileResponse(
+            open(served, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        # FileResponse names the open file, here possibly the .gz, in a
+        # Content-Disposition that static assets have no use for.
+        del response.headers['Content-Disposition']
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return self.patch_headers(response, name, stat)
+
+    def patch_headers(self, response, name, stat):
+        # A 304 must carry the same caching headers as the 200 it stands
+        # in for, so caches keep both under the same rules.
+        response.headers['Last-Modified'] = http_date(stat.st_mtime)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if name in self.hashed_names:
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=STATIC_IMMUTABLE_MAX_AGE,
+                immutable=True,
+            )
+        else:
+            patch_cache_control(response, public=True, max_age=STATIC_MAX_AGE)
+        return response
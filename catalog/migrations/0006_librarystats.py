@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:38
+from __future__ import annotations
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_alter_bookinstance_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryStats',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('num_books', models.BigIntegerField(default=0)),
+                ('num_instances', models.BigIntegerField(default=0)),
+                (
+                    'num_instances_available',
+                    models.BigIntegerField(default=0),
+                ),
+                ('num_authors', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'library stats',
+            },
+        ),
+    ]
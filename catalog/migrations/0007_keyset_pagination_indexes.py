@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:39
+from __future__ import annotations
+
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_librarystats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(
+                fields=['name', 'id'],
+                name='catalog_author_name_id_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(
+                fields=['title', 'id'],
+                name='catalog_book_title_id_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='bookinstance',
+            index=models.Index(
+                condition=models.Q(('status', 'o')),
+                fields=['borrower', 'due_back', 'uniqueId'],
+                name='catalog_bi_loans_due_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+# The DDL is frozen here rather than imported from catalog.search, so
+# this migration keeps working however the live search code changes.
+SQLITE_CREATE = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS "catalog_book_fts" USING fts5('
+    'title, summary, author_name, isbn, '
+    "tokenize = 'unicode61 remove_diacritics 2')"
+)
+SQLITE_INSERT = (
+    'INSERT OR REPLACE INTO "catalog_book_fts" '
+    '(rowid, title, summary, author_name, isbn) '
+    'VALUES (%s, %s, %s, %s, %s)'
+)
+POSTGRES_CREATE = (
+    'CREATE TABLE IF NOT EXISTS "catalog_book_fts" ('
+    'book_id bigint PRIMARY KEY REFERENCES catalog_book (id) '
+    'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+    'document tsvector NOT NULL)'
+)
+POSTGRES_INDEX = (
+    'CREATE INDEX IF NOT EXISTS "catalog_book_fts_document" '
+    'ON "catalog_book_fts" USING GIN (document)'
+)
+POSTGRES_INSERT = (
+    'INSERT INTO "catalog_book_fts" (book_id, document) VALUES (%s, '
+    "setweight(to_tsvector('simple', %s), 'A') || "
+    "setweight(to_tsvector('simple', %s), 'C') || "
+    "setweight(to_tsvector('simple', %s), 'B') || "
+    "setweight(to_tsvector('simple', %s), 'A')) "
+    'ON CONFLICT (book_id) DO UPDATE SET document = EXCLUDED.document'
+)
+DROP = 'DROP TABLE IF EXISTS "catalog_book_fts"'
+CHUNK_SIZE = 2000
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        create, insert = [SQLITE_CREATE], SQLITE_INSERT
+    elif vendor == 'postgresql':
+        create, insert = [POSTGRES_CREATE, POSTGRES_INDEX], POSTGRES_INSERT
+    else:
+        return
+    Book = apps.get_model('catalog', 'Book')
+    rows = Book.objects.using(schema_editor.connection.alias).values_list(
+        'id', 'title', 'summary', 'author__name', 'ISBN',
+    ).iterator(chunk_size=CHUNK_SIZE)
+    with schema_editor.connection.cursor() as cursor:
+        for sql in create:
+            cursor.execute(sql)
+        batch = []
+        for pk, title, summary, author, isbn in rows:
+            batch.append((pk, title, summary, author or '', isbn))
+            if len(batch) >= CHUNK_SIZE:
+                cursor.executemany(insert, batch)
+                batch = []
+        if batch:
+            cursor.executemany(insert, batch)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:45
+from __future__ import annotations
+
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_book_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookinstance',
+            index=models.Index(
+                fields=['status'],
+                name='catalog_bi_status_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='bookinstance',
+            index=models.Index(
+                fields=['book', 'status', 'due_back'],
+                name='catalog_bi_book_status_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:50
+from __future__ import annotations
+
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_bookinstance_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookinstance',
+            index=models.Index(
+                condition=models.Q(('status', 'o')),
+                fields=['due_back', 'uniqueId'],
+                name='catalog_bi_overdue_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:07
+from __future__ import annotations
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hold',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('fulfilled_at', models.DateTimeField(blank=True, null=True)),
+                (
+                    'updated_at',
+                    models.DateTimeField(auto_now=True, db_index=True),
+                ),
+                (
+                    'book',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='catalog.book',
+                    ),
+                ),
+                (
+                    'copy',
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to='catalog.bookinstance',
+                    ),
+                ),
+                (
+                    'patron',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [
+                    models.Index(
+                        condition=models.Q(('fulfilled_at__isnull', True)),
+                        fields=['book', 'created_at', 'id'],
+                        name='catalog_hold_queue_idx',
+                    ),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(
+                        condition=models.Q(('fulfilled_at__isnull', True)),
+                        fields=('book', 'patron'),
+                        name='catalog_hold_one_waiting',
+                    ),
+                ],
+            },
+        ),
+    ]
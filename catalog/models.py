@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import asyncio
 import uuid
 from datetime import date
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import BooleanField
+from django.db.models import Case
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import Value
+from django.db.models import When
+from django.db.models import Window
+from django.db.models.functions import RowNumber
 from django.urls import reverse
 
 from .constants import AUTHOR_NAME_MAX_LENGTH
@@ -21,6 +30,7 @@ from .constants import GENRE_NAME_HELP_TEXT
 from .constants import GENRE_NAME_MAX_LENGTH
 from .constants import LANGUAGE_NAME_HELP_TEXT
 from .constants import LANGUAGE_NAME_MAX_LENGTH
+from .constants import LIBRARY_STATS_PK
 from .constants import LoanStatusEnum
 
 
@@ -29,6 +39,7 @@ class Genre(models.Model):
         max_length=GENRE_NAME_MAX_LENGTH,
         help_text=GENRE_NAME_HELP_TEXT,
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -39,6 +50,7 @@ class Language(models.Model):
         max_length=LANGUAGE_NAME_MAX_LENGTH,
         help_text=LANGUAGE_NAME_HELP_TEXT,
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -48,6 +60,15 @@ class Author(models.Model):
     name = models.CharField(max_length=AUTHOR_NAME_MAX_LENGTH)
     date_of_birth = models.DateField(null=True, blank=True)
     date_of_death = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['name', 'id'],
+                name='catalog_author_name_id_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -75,6 +96,15 @@ class Book(models.Model):
         on_delete=models.SET_NULL,
         null=True,
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['title', 'id'],
+                name='catalog_book_title_id_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -83,6 +113,28 @@ class Book(models.Model):
         return reverse('book-detail', kwargs={'pk': self.pk})
 
 
+class BookInstanceQuerySet(models.QuerySet):
+    @staticmethod
+    def overdue_condition():
+        return Q(
+            status=LoanStatusEnum.ON_LOAN.code,
+            due_back__lt=date.today(),
+        )
+
+    def with_overdue(self):
+        """Annotate ``overdue_flag``, which ``is_overdue`` reads if present."""
+        return self.annotate(
+            overdue_flag=Case(
+                When(self.overdue_condition(), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+        )
+
+    def overdue(self):
+        return self.filter(self.overdue_condition())
+
+
 class BookInstance(models.Model):
     uniqueId = models.UUIDField(
         primary_key=True,
@@ -106,9 +158,29 @@ class BookInstance(models.Model):
         null=True,
         blank=True,
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = BookInstanceQuerySet.as_manager()
 
     class Meta:
         ordering = ['due_back']
+        indexes = [
+            models.Index(fields=['status'], name='catalog_bi_status_idx'),
+            models.Index(
+                fields=['book', 'status', 'due_back'],
+                name='catalog_bi_book_status_idx',
+            ),
+            models.Index(
+                fields=['borrower', 'due_back', 'uniqueId'],
+                condition=models.Q(status=LoanStatusEnum.ON_LOAN.code),
+                name='catalog_bi_loans_due_idx',
+            ),
+            models.Index(
+                fields=['due_back', 'uniqueId'],
+                condition=models.Q(status=LoanStatusEnum.ON_LOAN.code),
+                name='catalog_bi_overdue_idx',
+            ),
+        ]
         permissions = (
             ('can_mark_returned', 'Set book as returned'),
         )
@@ -118,8 +190,142 @@ class BookInstance(models.Model):
 
     @property
     def is_overdue(self):
-        return (
+        if 'overdue_flag' in self.__dict__:
+            return self.overdue_flag
+        return bool(
             self.due_back and
             date.today() > self.due_back and
-            self.status == LoanStatusEnum.ON_LOAN.code
+            self.status == LoanStatusEnum.ON_LOAN.code,
+        )
+
+
+class HoldQuerySet(models.QuerySet):
+    def waiting(self):
+        return self.filter(fulfilled_at__isnull=True)
+
+    def with_position(self):
+        """
+        Annotate every hold with its 1-based place in its book's queue.
+        Only meaningful on waiting() holds.
+        """
+        return self.annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F('book_id'),
+                order_by=[F('created_at').asc(), F('id').asc()],
+            ),
         )
+
+
+class Hold(models.Model):
+    """A patron waiting for any copy of a book, served first come first."""
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    patron = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    fulfilled_at = models.DateTimeField(null=True, blank=True)
+    copy = models.ForeignKey(
+        BookInstance,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = HoldQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            # The queue of one title in FIFO order, ignoring the history
+            # of fulfilled holds, so finding the next patron is a seek.
+            models.Index(
+                fields=['book', 'created_at', 'id'],
+                condition=models.Q(fulfilled_at__isnull=True),
+                name='catalog_hold_queue_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['book', 'patron'],
+                condition=models.Q(fulfilled_at__isnull=True),
+                name='catalog_hold_one_waiting',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.book} ({self.patron})'
+
+
+class LibraryStats(models.Model):
+    num_books = models.BigIntegerField(default=0)
+    num_instances = models.BigIntegerField(default=0)
+    num_instances_available = models.BigIntegerField(default=0)
+    num_authors = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'library stats'
+
+    def __str__(self):
+        return 'Library statistics'
+
+    @classmethod
+    def load(cls):
+        stats = cls.objects.filter(pk=LIBRARY_STATS_PK).first()
+        if stats is None:
+            stats = cls.rebuild()
+        return stats
+
+    @classmethod
+    def rebuild(cls):
+        stats, _ = cls.objects.update_or_create(
+            pk=LIBRARY_STATS_PK,
+            defaults={
+                'num_books': Book.objects.count(),
+                'num_instances': BookInstance.objects.count(),
+                'num_instances_available': BookInstance.objects.filter(
+                    status__exact=LoanStatusEnum.AVAILABLE.code,
+                ).count(),
+                'num_authors': Author.objects.count(),
+            },
+        )
+        return stats
+
+    @classmethod
+    async def aload(cls):
+        stats = await cls.objects.filter(pk=LIBRARY_STATS_PK).afirst()
+        if stats is None:
+            stats = await cls.arebuild()
+        return stats
+
+    @classmethod
+    async def arebuild(cls):
+        num_books, num_instances, num_available, num_authors = \
+            await asyncio.gather(
+                Book.objects.acount(),
+                BookInstance.objects.acount(),
+                BookInstance.objects.filter(
+                    status__exact=LoanStatusEnum.AVAILABLE.code,
+                ).acount(),
+                Author.objects.acount(),
+            )
+        stats, _ = await cls.objects.aupdate_or_create(
+            pk=LIBRARY_STATS_PK,
+            defaults={
+                'num_books': num_books,
+                'num_instances': num_instances,
+                'num_instances_available': num_available,
+                'num_authors': num_authors,
+            },
+        )
+        return stats
+
+    @classmethod
+    def bump(cls, **deltas):
+        # Counters are adjusted in SQL so concurrent writers never lose
+        # updates; a missing row is left for load() to rebuild.
+        changes = {
+            field: F(field) + delta
+            for field, delta in deltas.items() if delta
+        }
+        if changes:
+            cls.objects.filter(pk=LIBRARY_STATS_PK).update(**changes)
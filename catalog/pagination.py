@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from django.core.paginator import EmptyPage
+from django.core.paginator import InvalidPage
+from django.core.paginator import PageNotAnInteger
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+from django.utils.translation import gettext as _
+
+from catalog.caching import cached_query
+from catalog.constants import ESTIMATED_COUNT_THRESHOLD
+from catalog.constants import KEYSET_CURSOR_PARAM
+from catalog.constants import KEYSET_CURSOR_SALT
+
+AFTER = 'a'
+BEFORE = 'b'
+
+
+def encode_cursor(direction, values):
+    return signing.dumps(
+        [direction, [None if v is None else str(v) for v in values]],
+        salt=KEYSET_CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(token, fields):
+    try:
+        direction, values = signing.loads(token, salt=KEYSET_CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise InvalidPage(_('Invalid cursor.'))
+    if direction not in (AFTER, BEFORE) or len(values) != len(fields):
+        raise InvalidPage(_('Invalid cursor.'))
+    try:
+        values = [
+            None if value is None else field.to_python(value)
+            for field, value in zip(fields, values)
+        ]
+    except Exception:
+        raise InvalidPage(_('Invalid cursor.'))
+    return direction, values
+
+
+def estimated_table_rows(model, using):
+    """
+    The planner's row count for ``model``'s table as of the last ANALYZE,
+    or None where the backend keeps no such statistics.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [connection.ops.quote_name(table)],
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'",
+            )
+            if cursor.fetchone() is None:
+                return None
+            # Every index row of a table starts with the table's size.
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    rows = int(float(str(row[0]).split()[0]))
+    # PostgreSQL reports -1 for tables that were never analyzed.
+    return rows if rows >= 0 else None
+
+
+def estimated_count(queryset):
+    """
+    The planner's estimate of ``queryset.count()``: table statistics for
+    a plain table scan, the row estimate of EXPLAIN for anything filtered
+    on PostgreSQL, otherwise None.
+    """
+    query = queryset.query
+    estimate = None
+    if not query.has_filters() and not query.distinct:
+        estimate = estimated_table_rows(queryset.model, queryset.db)
+    if estimate is None and connections[queryset.db].vendor == 'postgresql':
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+    return estimate
+
+
+def cached_count(queryset):
+    """
+    Exact ``queryset.count()``, cached until one of the models it reads
+    changes.
+    """
+    tables = {alias.table_name for alias in queryset.query.alias_map.values()}
+    models = {queryset.model}
+    for model in apps.get_models(include_auto_created=True):
+        if model._meta.db_table in tables:
+            # M2M tables are versioned with the model declaring them.
+            models.add(model._meta.auto_created or model)
+    sql, params = queryset.order_by().query.sql_with_params()
+    return cached_query(
+        'catalog.pagination.count',
+        models,
+        queryset.count,
+        key=(queryset.db, sql, *params),
+    )
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that stops counting at ``exact_count_limit`` rows. Past it
+    the count is the planner's estimate, with ``count_is_estimate`` set
+    for templates and pages beyond the estimate still reachable, or an
+    exact count cached across requests where the database gives none.
+    """
+
+    exact_count_limit = ESTIMATED_COUNT_THRESHOLD
+    count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query') or queryset.query.is_sliced:
+            return super().count
+        exact = queryset.order_by()[:self.exact_count_limit + 1].count()
+        if exact <= self.exact_count_limit:
+            return exact
+        estimate = estimated_count(queryset)
+        if estimate is None:
+            return cached_count(queryset)
+        self.count_is_estimate = True
+        return max(estimate, exact)
+
+    async def acount(self):
+        return await sync_to_async(lambda: self.count)()
+
+    def validate_number(self, number):
+        if not (self.count and self.count_is_estimate):
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_estimate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page],
+            number,
+            self,
+        )
+
+
+class KeysetPage:
+    is_keyset = True
+
+    def __init__(
+        self, object_list, paginator, has_next, has_previous,
+        next_cursor=None, previous_cursor=None,
+    ):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Keyset page of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginator:
+    """
+    Seek-based paginator: each page is fetched with a WHERE on the last
+    seen ordering key instead of COUNT(*) and OFFSET, so every page costs
+    the same however deep it is. ``ordering`` must end in a unique field.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        opts = queryset.model._meta
+        self.fields = [
+            opts.pk if name == 'pk' else opts.get_field(name)
+            for name in self.ordering
+        ]
+
+    def _order_by(self, reverse=False):
+        expressions = []
+        for name, field in zip(self.ordering, self.fields):
+            nulls = {}
+            if field.null:
+                # NULL keys always sort after every other value.
+                nulls = {'nulls_first': True} if reverse else \
+                    {'nulls_last': True}
+            column = F(name)
+            expressions.append(
+                column.desc(**nulls) if reverse else column.asc(**nulls),
+            )
+        return expressions
+
+    def _seek(self, direction, values):
+        lookup = 'gt' if direction == AFTER else 'lt'
+        condition = Q(pk__in=[])
+        equal = Q()
+        for name, field, value in zip(self.ordering, self.fields, values):
+            if value is None:
+                if direction == BEFORE:
+                    condition |= equal & Q(**{f'{name}__isnull': False})
+                equal &= Q(**{f'{name}__isnull': True})
+                continue
+            beyond = Q(**{f'{name}__{lookup}': value})
+            if field.null and direction == AFTER:
+                beyond |= Q(**{f'{name}__isnull': True})
+            condition |= equal & beyond
+            equal &= Q(**{name: value})
+        return condition
+
+    def _key(self, obj):
+        if isinstance(obj, dict):
+            # Rows from values() are keyed by the ordering lookups.
+            return [obj[name] for name in self.ordering]
+        return [getattr(obj, field.attname) for field in self.fields]
+
+    def _queryset(self, cursor):
+        queryset = self.queryset
+        direction = AFTER
+        if cursor:
+            direction, values = decode_cursor(cursor, self.fields)
+            queryset = queryset.filter(self._seek(direction, values))
+        queryset = queryset.order_by(
+            *self._order_by(reverse=direction == BEFORE),
+        )
+        return queryset[:self.per_page + 1], direction
+
+    def _page(self, rows, direction, cursor):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if direction == BEFORE:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(AFTER, self._key(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor(BEFORE, self._key(rows[0]))
+        return KeysetPage(
+            rows,
+            self,
+            has_next=next_cursor is not None,
+            has_previous=previous_cursor is not None,
+            next_cursor=next_cursor,
+            previous_cursor=previous_cursor,
+        )
+
+    def page(self, cursor=None):
+        queryset, direction = self._queryset(cursor)
+        return self._page(list(queryset), direction, cursor)
+
+    async def apage(self, cursor=None):
+        queryset, direction = self._queryset(cursor)
+        return self._page(
+            [obj async for obj in queryset],
+            direction,
+            cursor,
+        )
+
+
+class KeysetPaginationMixin:
+    """
+    Opt-in cursor pagination for ListViews. Enabled per request with the
+    ``cursor`` query parameter or for every request with the
+    ``CATALOG_KEYSET_PAGINATION`` setting.
+    """
+
+    keyset_ordering = None
+    cursor_kwarg = KEYSET_CURSOR_PARAM
+
+    def keyset_enabled(self):
+        return self.keyset_ordering is not None and (
+            self.cursor_kwarg in self.request.GET or
+            getattr(settings, 'CATALOG_KEYSET_PAGINATION', False)
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.keyset_enabled():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return (paginator, page, page.object_list, page.has_other_pages())
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+@dataclass
+class RoutingState:
+    read_from_replica: bool = False
+    wrote: bool = False
+    replica: str | None = None
+
+    def enable_replica_reads(self):
+        """
+        Send the request's reads to one replica, picked now, so a page's
+        count and its rows never come from replicas with different lag.
+        """
+        self.replica = random.choice(read_replicas())
+        self.read_from_replica = True
+
+
+# Set per request by ReplicaRoutingMiddleware. The state is mutated in
+# place, so flags raised in a view are seen by the middleware even where
+# asgiref runs them in copies of the context.
+_routing_state = ContextVar('catalog_routing_state', default=None)
+
+
+def read_replicas():
+    return getattr(settings, 'CATALOG_READ_REPLICAS', [])
+
+
+@contextmanager
+def routing_state():
+    state = RoutingState()
+    token = _routing_state.set(state)
+    try:
+        yield state
+    finally:
+        _routing_state.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, even in a replica view."""
+    state = _routing_state.get()
+    if state is None or not state.read_from_replica:
+        yield
+        return
+    state.read_from_replica = False
+    try:
+        yield
+    finally:
+        state.read_from_replica = True
+
+
+class ReplicaReadMixin:
+    """
+    Mark a view whose reads may be served by a replica. Only safe requests
+    from clients not pinned to the primary are routed there, for the whole
+    request including template rendering.
+    """
+    read_from_replica = True
+
+
+class ReplicaRouter:
+    """
+    Reads made while serving a ReplicaReadMixin view go to the replica
+    picked for the request; every other read and every write go to the
+    primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None and state.read_from_replica:
+            return state.replica
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        return False if db in read_replicas() else None
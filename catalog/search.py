@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import re
+
+from django.db import connections
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import FloatField
+from django.db.models import Q
+from django.db.models import Value
+from django.db.models.expressions import RawSQL
+
+from catalog.constants import SEARCH_INDEX_CHUNK_SIZE
+from catalog.constants import SEARCH_INDEX_TABLE
+from catalog.constants import SEARCH_PG_CONFIG
+from catalog.models import Book
+
+DOCUMENT_FIELDS = ('id', 'title', 'summary', 'author__name', 'ISBN')
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+def document_rows(queryset):
+    return queryset.values_list(*DOCUMENT_FIELDS).iterator(
+        chunk_size=SEARCH_INDEX_CHUNK_SIZE,
+    )
+
+
+class BaseSearchBackend:
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def quote(self, name):
+        return self.connection.ops.quote_name(name)
+
+    def create_index(self):
+        pass
+
+    def drop_index(self):
+        pass
+
+    def index_rows(self, rows):
+        pass
+
+    def remove(self, book_ids):
+        pass
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        condition = Q()
+        for term in terms:
+            condition &= (
+                Q(title__icontains=term) |
+                Q(summary__icontains=term) |
+                Q(author__name__icontains=term) |
+                Q(ISBN__icontains=term)
+            )
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField()),
+        ).order_by('title', 'pk')
+
+    def _executemany(self, sql, rows):
+        batch = []
+        with self.connection.cursor() as cursor:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= SEARCH_INDEX_CHUNK_SIZE:
+                    cursor.executemany(sql, batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+
+    def _ranked(self, queryset, match_sql, rank_sql, params, descending):
+        table = self.quote(queryset.model._meta.db_table)
+        index = self.quote(SEARCH_INDEX_TABLE)
+        matched = RawSQL(match_sql.format(index=index), params)
+        rank = RawSQL(rank_sql.format(index=index, table=table), params)
+        return queryset.filter(pk__in=matched).annotate(
+            search_rank=rank,
+        ).order_by('-search_rank' if descending else 'search_rank', 'pk')
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """FTS5 virtual table keyed by Book.id, ranked with bm25()."""
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS '
+                f'{self.quote(SEARCH_INDEX_TABLE)} USING fts5('
+                f"title, summary, author_name, isbn, "
+                f"tokenize = 'unicode61 remove_diacritics 2')",
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DROP TABLE IF EXISTS {self.quote(SEARCH_INDEX_TABLE)}',
+            )
+
+    def index_rows(self, rows):
+        self._executemany(
+            f'INSERT OR REPLACE INTO {self.quote(SEARCH_INDEX_TABLE)} '
+            f'(rowid, title, summary, author_name, isbn) '
+            f'VALUES (%s, %s, %s, %s, %s)',
+            ((pk, title, summary, author or '', isbn)
+             for pk, title, summary, author, isbn in rows),
+        )
+
+    def remove(self, book_ids):
+        self._executemany(
+            f'DELETE FROM {self.quote(SEARCH_INDEX_TABLE)} WHERE rowid = %s',
+            ((pk,) for pk in book_ids),
+        )
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        match = ' '.join(f'"{term}"*' for term in terms)
+        # Column weights follow the table definition: title, summary,
+        # author_name, isbn. bm25() is negative; lower ranks better.
+        return self._ranked(
+            queryset,
+            'SELECT rowid FROM {index} WHERE {index} MATCH %s',
+            'SELECT bm25({index}, 10.0, 1.0, 5.0, 10.0) FROM {index} '
+            'WHERE {index} MATCH %s AND rowid = {table}.id',
+            [match],
+            descending=False,
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Weighted tsvector per book in a side table with a GIN index."""
+
+    def create_index(self):
+        index = self.quote(SEARCH_INDEX_TABLE)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {index} ('
+                f'book_id bigint PRIMARY KEY REFERENCES catalog_book (id) '
+                f'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+                f'document tsvector NOT NULL)',
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS '
+                f'{self.quote(SEARCH_INDEX_TABLE + "_document")} '
+                f'ON {index} USING GIN (document)',
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DROP TABLE IF EXISTS {self.quote(SEARCH_INDEX_TABLE)}',
+            )
+
+    def index_rows(self, rows):
+        vector = "setweight(to_tsvector('{config}', %s), '{weight}')"
+        document = ' || '.join(
+            vector.format(config=SEARCH_PG_CONFIG, weight=weight)
+            for weight in ('A', 'C', 'B', 'A')
+        )
+        self._executemany(
+            f'INSERT INTO {self.quote(SEARCH_INDEX_TABLE)} '
+            f'(book_id, document) VALUES (%s, {document}) '
+            f'ON CONFLICT (book_id) DO UPDATE SET document = '
+            f'EXCLUDED.document',
+            ((pk, title, summary, author or '', isbn)
+             for pk, title, summary, author, isbn in rows),
+        )
+
+    def remove(self, book_ids):
+        book_ids = list(book_ids)
+        if not book_ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.quote(SEARCH_INDEX_TABLE)} '
+                f'WHERE book_id = ANY(%s)',
+                [book_ids],
+            )
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        ts = f"to_tsquery('{SEARCH_PG_CONFIG}', %s)"
+        return self._ranked(
+            queryset,
+            f'SELECT book_id FROM {{index}} WHERE document @@ {ts}',
+            f'SELECT ts_rank(document, {ts}) FROM {{index}} '
+            f'WHERE book_id = {{table}}.id',
+            [tsquery],
+            descending=True,
+        )
+
+
+def get_search_backend(using=DEFAULT_DB_ALIAS):
+    engine = connections[using].settings_dict['ENGINE']
+    if engine.endswith('sqlite3'):
+        return SQLiteSearchBackend(using)
+    if 'postgresql' in engine:
+        return PostgresSearchBackend(using)
+    return BaseSearchBackend(using)
+
+
+def index_books(book_ids):
+    book_ids = list(book_ids)
+    if book_ids:
+        get_search_backend().index_rows(
+            document_rows(Book.objects.filter(pk__in=book_ids)),
+        )
+
+
+def remove_books(book_ids):
+    get_search_backend().remove(book_ids)
+
+
+def rebuild_search_index():
+    backend = get_search_backend()
+    backend.drop_index()
+    backend.create_index()
+    backend.index_rows(document_rows(Book.objects.all()))
+
+
+def search_books(query, queryset=None):
+    if queryset is None:
+        queryset = Book.objects.all()
+    return get_search_backend(queryset.db).search(queryset, query)
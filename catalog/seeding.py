@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import random
+from datetime import date
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from catalog.caching import mark_models_changed
+from catalog.constants import LoanStatusEnum
+from catalog.constants import SEED_BATCH_SIZE
+from catalog.constants import SEED_STATUS_WEIGHTS
+from catalog.models import Author
+from catalog.models import Book
+from catalog.models import BookInstance
+from catalog.models import Genre
+from catalog.models import Language
+from catalog.models import LibraryStats
+from catalog.search import rebuild_search_index
+
+
+def skewed_index(rng, size, skew):
+    # Power-law pick in [0, size): low indexes are much more popular.
+    return min(int(size * rng.random() ** skew), size - 1)
+
+
+def _bulk(model, objs):
+    return model.objects.bulk_create(objs, batch_size=SEED_BATCH_SIZE)
+
+
+def seed_catalog(
+    num_instances,
+    num_books=None,
+    num_authors=None,
+    num_genres=50,
+    num_borrowers=None,
+    skew=3.0,
+    seed=0,
+):
+    """
+    Fill the database with a synthetic catalog. Authors, genres and
+    borrowers are picked with a power-law skew so a few of them own most
+    books and loans, like a real library.
+    """
+    rng = random.Random(seed)
+    num_books = num_books or max(num_instances // 5, 1)
+    num_authors = num_authors or max(num_books // 10, 1)
+    num_borrowers = num_borrowers or max(num_instances // 20, 1)
+    statuses = [status.code for status in SEED_STATUS_WEIGHTS]
+    weights = list(SEED_STATUS_WEIGHTS.values())
+    today = date.today()
+
+    with transaction.atomic():
+        languages = _bulk(Language, [
+            Language(name=name) for name in ('English', 'Vietnamese', 'French')
+        ])
+        genres = _bulk(Genre, [
+            Genre(name=f'Genre {i}') for i in range(num_genres)
+        ])
+        authors = _bulk(Author, [
+            Author(name=f'Author {i:07d}') for i in range(num_authors)
+        ])
+        borrowers = _bulk(User, [
+            User(username=f'patron{i:07d}') for i in range(num_borrowers)
+        ])
+
+        book_ids = []
+        for start in range(0, num_books, SEED_BATCH_SIZE):
+            stop = min(start + SEED_BATCH_SIZE, num_books)
+            books = _bulk(Book, [
+                Book(
+                    title=f'Title {rng.randrange(num_books):07d} {i}',
+                    summary=f'Synthetic summary for book {i}.',
+                    ISBN=f'{i:013d}',
+                    author_id=authors[
+                        skewed_index(rng, num_authors, skew)
+                    ].pk,
+                    language_id=rng.choice(languages).pk,
+                )
+                for i in range(start, stop)
+            ])
+            _bulk(Book.genre.through, [
+                Book.genre.through(
+                    book_id=book.pk,
+                    genre_id=genres[skewed_index(rng, num_genres, skew)].pk,
+                )
+                for book in books
+            ])
+            book_ids.extend(book.pk for book in books)
+
+        for start in range(0, num_instances, SEED_BATCH_SIZE):
+            stop = min(start + SEED_BATCH_SIZE, num_instances)
+            copies = []
+            for _ in range(start, stop):
+                status = rng.choices(statuses, weights)[0]
+                on_loan = status == LoanStatusEnum.ON_LOAN.code
+                copies.append(
+                    BookInstance(
+                        book_id=book_ids[
+                            skewed_index(rng, num_books, skew / 2)
+                        ],
+                        status=status,
+                        due_back=today + timedelta(
+                            days=rng.randint(-30, 30),
+                        ) if on_loan else None,
+                        borrower_id=borrowers[
+                            skewed_index(rng, num_borrowers, skew)
+                        ].pk if on_loan else None,
+                    ),
+                )
+            _bulk(BookInstance, copies)
+
+    LibraryStats.rebuild()
+    rebuild_search_index()
+    mark_models_changed([Language, Genre, Author, Book, BookInstance])
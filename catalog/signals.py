@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_init
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from catalog.caching import mark_books_changed
+from catalog.caching import mark_models_changed
+from catalog.constants import LoanStatusEnum
+from catalog.models import Author
+from catalog.models import Book
+from catalog.models import BookInstance
+from catalog.models import Genre
+from catalog.models import Language
+from catalog.models import LibraryStats
+from catalog.search import index_books
+from catalog.search import remove_books
+
+
+def _is_available(status):
+    return status == LoanStatusEnum.AVAILABLE.code
+
+
+@receiver(post_init, sender=BookInstance)
+def remember_loaded_status(sender, instance, **kwargs):
+    # Read from __dict__ so deferred status fields are not fetched.
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=BookInstance)
+def count_saved_instance(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    was_available = not created and _is_available(instance._loaded_status)
+    now_available = _is_available(instance.status)
+    LibraryStats.bump(
+        num_instances=1 if created else 0,
+        num_instances_available=int(now_available) - int(was_available),
+    )
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=BookInstance)
+def count_deleted_instance(sender, instance, **kwargs):
+    LibraryStats.bump(
+        num_instances=-1,
+        num_instances_available=-int(_is_available(instance._loaded_status)),
+    )
+
+
+@receiver(post_save, sender=Book)
+def count_saved_book(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        LibraryStats.bump(num_books=1)
+
+
+@receiver(post_delete, sender=Book)
+def count_deleted_book(sender, instance, **kwargs):
+    LibraryStats.bump(num_books=-1)
+
+
+@receiver(post_save, sender=Author)
+def count_saved_author(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        LibraryStats.bump(num_authors=1)
+
+
+@receiver(post_delete, sender=Author)
+def count_deleted_author(sender, instance, **kwargs):
+    LibraryStats.bump(num_authors=-1)
+
+
+@receiver(post_save, sender=Book)
+def index_saved_book(sender, instance, **kwargs):
+    index_books([instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+def unindex_deleted_book(sender, instance, **kwargs):
+    remove_books([instance.pk])
+
+
+@receiver(post_save, sender=Author)
+def reindex_author_books(sender, instance, created, **kwargs):
+    if not created:
+        index_books(instance.book_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Language)
+def remember_related_books(sender, instance, **kwargs):
+    # Deleting these detaches their books without Book signals firing.
+    instance._book_ids = list(
+        instance.book_set.values_list('pk', flat=True),
+    )
+
+
+@receiver(post_delete, sender=Author)
+def reindex_orphaned_books(sender, instance, **kwargs):
+    index_books(getattr(instance, '_book_ids', ()))
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def book_changed(sender, instance, **kwargs):
+    # auto_now already moved this book's updated_at.
+    mark_books_changed([instance.pk], touch=False)
+
+
+@receiver(post_save, sender=BookInstance)
+@receiver(post_delete, sender=BookInstance)
+def book_instance_changed(sender, instance, **kwargs):
+    mark_books_changed([instance.book_id])
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Language)
+def related_saved(sender, instance, created, **kwargs):
+    if not created:
+        mark_books_changed(instance.book_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Language)
+def related_deleted(sender, instance, **kwargs):
+    mark_books_changed(getattr(instance, '_book_ids', ()))
+
+
+@receiver(m2m_changed, sender=Book.genre.through)
+def book_genres_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._book_ids = list(
+            instance.book_set.values_list('pk', flat=True),
+        )
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            mark_books_changed([instance.pk])
+        elif action == 'post_clear':
+            mark_books_changed(getattr(instance, '_book_ids', ()))
+        else:
+            mark_books_changed(pk_set or ())
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=BookInstance)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Language)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=BookInstance)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Language)
+def model_changed(sender, **kwargs):
+    mark_models_changed([sender])
+
+
+@receiver(m2m_changed, sender=Book.genre.through)
+def genre_links_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        mark_models_changed([Book, Genre])
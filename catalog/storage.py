@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from catalog.constants import STATIC_COMPRESS_SUFFIXES
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def compressed_variants(data):
+    """Yield ``(suffix, payload)`` for every encoding available here."""
+    yield '.gz', gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress(data, mode=brotli.MODE_TEXT)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage that also writes .gz and, with the brotli package
+    installed, .br copies of every compressible file at collectstatic
+    time, for StaticFilesMiddleware to serve. Until collectstatic has
+    written a manifest, names are used unhashed so development and tests
+    run without one.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def url_converter(self, name, hashed_files, template=None):
+        convert = super().url_converter(name, hashed_files, template)
+
+        def converter(matchobj):
+            try:
+                return convert(matchobj)
+            except ValueError:
+                # References to files that are not shipped, such as the
+                # source map named in bootstrap.min.css, are left as is.
+                return matchobj.group(0)
+
+        return converter
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = {*paths, *self.hashed_files.values()}
+        for name in sorted(names):
+            if name.endswith(STATIC_COMPRESS_SUFFIXES):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as handle:
+            data = handle.read()
+        for suffix, payload in compressed_variants(data):
+            # Already compressed files may not shrink any further.
+            if len(payload) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self.save(name + suffix, ContentFile(payload))
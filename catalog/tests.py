@@ -1,12 +1,90 @@
 from __future__ import annotations
 
+import csv
 import datetime
+import gzip
+import io
+import json
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
 
+from asgiref.sync import async_to_sync
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db import connections
+from django.db import DEFAULT_DB_ALIAS
+from django.http import FileResponse
+from django.template import engines
+from django.templatetags.static import static
+from django.test import AsyncClient
+from django.test import Client
+from django.test import override_settings
 from django.test import TestCase
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django.utils import translation
 
+from catalog import async_views
+from catalog import replicas
+from catalog import views
+from catalog.benchmarks import analyze
+from catalog.benchmarks import asgi_throughput
+from catalog.benchmarks import benchmark_url
+from catalog.benchmarks import catalog_urls
+from catalog.benchmarks import read_urlconf
+from catalog.benchmarks import read_urls
+from catalog.benchmarks import explain_hot_queries
+from catalog.benchmarks import sample_objects
+from catalog.benchmarks import wsgi_throughput
+from catalog.caching import bump_versions
+from catalog.caching import cached_query
+from catalog.caching import local_cache
+from catalog.caching import model_scope
+from catalog.circulation import bulk_return
+from catalog.circulation import cancel_hold
+from catalog.circulation import checkout
+from catalog.circulation import checkout_any
+from catalog.circulation import CirculationError
+from catalog.circulation import default_due_back
+from catalog.circulation import place_hold
+from catalog.circulation import queue_positions
+from catalog.circulation import reserve
+from catalog.circulation import return_copy
+from catalog.constants import BENCHMARK_POST_ONLY_URLS
+from catalog.constants import LoanStatusEnum
+from catalog.constants import PROMETHEUS_CONTENT_TYPE
+from catalog.constants import REPLICA_PIN_COOKIE_NAME
+from catalog.constants import STATIC_MAX_AGE
 from catalog.forms import RenewBookForm
+from catalog.metrics import registry
 from catalog.models import Author
+from catalog.models import Book
+from catalog.models import BookInstance
+from catalog.models import Genre
+from catalog.models import Hold
+from catalog.models import Language
+from catalog.models import LibraryStats
+from catalog.pagination import EstimatedCountPaginator
+from catalog.pagination import KeysetPaginator
+from catalog.replicas import ReplicaRouter
+from catalog.replicas import routing_state
+from catalog.search import search_books
+from catalog.seeding import seed_catalog
+from catalog.urls import urlpatterns as catalog_urlpatterns
 
 
 class AuthorModelTest(TestCase):
@@ -236,3 +314,1876 @@ class AuthorListViewTest(TestCase):
         self.assertIn('paginator', response.context)
         self.assertIn('page_obj', response.context)
         self.assertIn('is_paginated', response.context)
+
+
+class LibraryStatsTest(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name='Stats Author')
+        self.book = Book.objects.create(
+            title='Stats Book',
+            author=self.author,
+            summary='Summary',
+            ISBN='1234567890123',
+        )
+        LibraryStats.rebuild()
+
+    def assertStats(self, **expected):
+        stats = LibraryStats.objects.get()
+        for field, value in expected.items():
+            self.assertEqual(getattr(stats, field), value, field)
+
+    def test_rebuild_counts_existing_rows(self):
+        self.assertStats(
+            num_books=1,
+            num_instances=0,
+            num_instances_available=0,
+            num_authors=1,
+        )
+
+    def test_counters_follow_instance_lifecycle(self):
+        instance = BookInstance.objects.create(
+            book=self.book,
+            status=LoanStatusEnum.AVAILABLE.code,
+        )
+        self.assertStats(num_instances=1, num_instances_available=1)
+
+        instance.status = LoanStatusEnum.ON_LOAN.code
+        instance.save()
+        self.assertStats(num_instances=1, num_instances_available=0)
+
+        instance = BookInstance.objects.get(pk=instance.pk)
+        instance.status = LoanStatusEnum.AVAILABLE.code
+        instance.save()
+        self.assertStats(num_instances_available=1)
+
+        instance.delete()
+        self.assertStats(num_instances=0, num_instances_available=0)
+
+    def test_counters_follow_books_and_authors(self):
+        Author.objects.create(name='Second Author')
+        self.assertStats(num_authors=2)
+
+        self.book.delete()
+        self.assertStats(num_books=0)
+
+    def test_load_rebuilds_missing_row(self):
+        LibraryStats.objects.all().delete()
+        stats = LibraryStats.load()
+        self.assertEqual(stats.num_books, 1)
+        self.assertEqual(stats.num_authors, 1)
+
+    def test_rebuild_command_fixes_drift(self):
+        LibraryStats.objects.update(num_books=42, num_authors=0)
+        call_command('rebuild_library_stats', stdout=io.StringIO())
+        self.assertStats(num_books=1, num_authors=1)
+
+    def test_index_uses_stored_statistics(self):
+        LibraryStats.objects.update(num_books=7)
+        response = self.client.get('/en/catalog/')
+        self.assertEqual(response.context['num_book'], 7)
+        self.assertEqual(response.context['num_authors'], 1)
+
+
+class KeysetPaginationTest(TestCase):
+    url = '/en/catalog/authors/'
+
+    def setUp(self):
+        for i in range(25):
+            Author.objects.create(name=f'Author {i % 12:02d}')
+
+    def walk(self, cursor, key):
+        names = []
+        while cursor is not None:
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page_obj']
+            names.extend(author.pk for author in page.object_list)
+            cursor = getattr(page, key)
+        return names
+
+    def test_forward_walk_matches_offset_ordering(self):
+        expected = list(
+            Author.objects.order_by('name', 'id').values_list('pk', flat=True),
+        )
+        self.assertEqual(self.walk('', 'next_cursor'), expected)
+
+    def test_backward_walk_returns_previous_pages(self):
+        response = self.client.get(self.url, {'cursor': ''})
+        first_page = [a.pk for a in response.context['author_list']]
+        cursor = response.context['page_obj'].next_cursor
+
+        response = self.client.get(self.url, {'cursor': cursor})
+        page = response.context['page_obj']
+        self.assertTrue(page.has_previous())
+
+        response = self.client.get(
+            self.url, {'cursor': page.previous_cursor},
+        )
+        page = response.context['page_obj']
+        self.assertEqual([a.pk for a in page.object_list], first_page)
+        self.assertFalse(page.has_previous())
+
+    def test_deep_page_does_not_count(self):
+        response = self.client.get(self.url, {'cursor': ''})
+        cursor = response.context['page_obj'].next_cursor
+        # One indexed MAX(updated_at) for conditional GET, then the page.
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any('COUNT(' in q['sql'] for q in queries))
+
+    def test_tampered_cursor_is_404(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_numbers_still_work_without_cursor(self):
+        response = self.client.get(self.url, {'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].number, 2)
+
+    def test_nullable_key_sorts_last(self):
+        book = Book.objects.create(
+            title='Keyset', summary='Summary', ISBN='9780000000001',
+        )
+        due = [datetime.date(2030, 1, d) for d in (3, 1, 2)] + [None, None]
+        for due_back in due:
+            BookInstance.objects.create(book=book, due_back=due_back)
+        expected = sorted(
+            BookInstance.objects.values_list('due_back', 'uniqueId'),
+            key=lambda row: (row[0] is None, row[0] or 0, row[1]),
+        )
+
+        paginator = KeysetPaginator(
+            BookInstance.objects.all(), 2, ('due_back', 'uniqueId'),
+        )
+        seen = []
+        page = paginator.page()
+        while True:
+            seen.extend((bi.due_back, bi.uniqueId) for bi in page)
+            if not page.has_next():
+                break
+            page = paginator.page(page.next_cursor)
+        self.assertEqual(seen, expected)
+
+
+class EstimatedCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Counted Author')
+        for i in range(7):
+            Book.objects.create(
+                title=f'Counted Book {i}',
+                author=cls.author,
+                ISBN=f'{9780000002000 + i}',
+            )
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(
+            EstimatedCountPaginator, 'exact_count_limit', 3,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_list_page_flags_estimated_total(self):
+        analyze()
+        with mock.patch.object(views.BookListView, 'paginate_by', 2):
+            response = self.client.get('/en/catalog/books/')
+        self.assertTrue(response.context['paginator'].count_is_estimate)
+        self.assertContains(response, 'Page 1 of about 4')
+
+    def test_admin_changelist_flags_estimated_total(self):
+        analyze()
+        self.client.force_login(
+            User.objects.create_superuser('admin', 'a@b.c', 'pw'),
+        )
+        response = self.client.get('/en/admin/catalog/book/')
+        self.assertContains(response, 'about 7 books')
+
+    def test_async_list_page_flags_estimated_total(self):
+        analyze()
+        with override_settings(ROOT_URLCONF=read_urlconf(async_views)):
+            response = async_to_sync(AsyncClient().get)('/en/catalog/books/')
+        self.assertTrue(response.context['paginator'].count_is_estimate)
+        self.assertEqual(response.context['paginator'].count, 7)
+
+    def test_exact_count_is_cached_without_estimate(self):
+        queryset = Book.objects.filter(
+            author=self.author,
+        ).order_by('title')
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 7)
+        paginator = EstimatedCountPaginator(queryset, 2)
+        # Only the capped count runs; the exact total comes from the cache.
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 7)
+        self.assertFalse(paginator.count_is_estimate)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(
+                title='Counted Book 7',
+                author=self.author,
+                ISBN='9780000002007',
+            )
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 8)
+
+
+class BookSearchTest(TestCase):
+    url = '/en/catalog/books/search/'
+
+    def setUp(self):
+        self.tolkien = Author.objects.create(name='John Tolkien')
+        self.hobbit = Book.objects.create(
+            title='The Hobbit',
+            author=self.tolkien,
+            summary='A hobbit goes there and back again.',
+            ISBN='9780261102217',
+        )
+        self.silmarillion = Book.objects.create(
+            title='The Silmarillion',
+            author=self.tolkien,
+            summary='Elder days and the jewels of Feanor.',
+            ISBN='9780261102736',
+        )
+        self.dune = Book.objects.create(
+            title='Dune',
+            author=Author.objects.create(name='Frank Herbert'),
+            summary='Spice, sand and a hobbit-free desert.',
+            ISBN='9780441013593',
+        )
+
+    def search(self, query):
+        response = self.client.get(self.url, {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['book_list'])
+
+    def test_title_match_ranks_above_summary_match(self):
+        self.assertEqual(self.search('hobbit'), [self.hobbit, self.dune])
+
+    def test_prefix_and_author_match(self):
+        self.assertEqual(
+            set(self.search('tolk')),
+            {self.hobbit, self.silmarillion},
+        )
+
+    def test_isbn_match(self):
+        self.assertEqual(self.search('9780441013593'), [self.dune])
+
+    def test_index_follows_book_and_author_changes(self):
+        self.dune.title = 'Children of Dune'
+        self.dune.save()
+        self.assertEqual(self.search('children'), [self.dune])
+
+        self.tolkien.name = 'J. R. R. Tolkien'
+        self.tolkien.save()
+        self.assertEqual(len(self.search('R Tolkien')), 2)
+
+        self.hobbit.delete()
+        self.assertEqual(self.search('hobbit'), [self.dune])
+
+    def test_empty_or_symbol_query_returns_nothing(self):
+        self.assertEqual(self.search(''), [])
+        self.assertEqual(self.search('"*('), [])
+
+    def test_admin_search_uses_index(self):
+        admin_user = User.objects.create_superuser('admin', 'a@b.c', 'pw')
+        self.client.force_login(admin_user)
+        response = self.client.get(
+            '/en/admin/catalog/book/', {'q': 'silmar'},
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list),
+            [self.silmarillion],
+        )
+
+    def test_rebuild_command(self):
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(self.search('silmarillion'), [self.silmarillion])
+
+
+class AuthorDetailViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name='Prolific Author')
+        self.genres = [
+            Genre.objects.create(name=f'Genre {i}') for i in range(3)
+        ]
+
+    def add_books(self, count):
+        start = Book.objects.count()
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(start, start + count):
+                book = Book.objects.create(
+                    title=f'Book {i:03d}',
+                    author=self.author,
+                    summary='Summary',
+                    ISBN=f'{i:013d}',
+                )
+                book.genre.set(self.genres)
+
+    def get(self):
+        return self.client.get(f'/en/catalog/author/{self.author.pk}/')
+
+    def test_query_count_is_constant(self):
+        # Author, its books and one prefetch for every book's genres.
+        self.add_books(1)
+        with self.assertNumQueries(3):
+            self.get()
+
+        self.add_books(20)
+        with self.assertNumQueries(3):
+            response = self.get()
+        self.assertEqual(len(response.context['author_books']), 21)
+
+    def test_books_are_cached_until_they_change(self):
+        self.add_books(2)
+        self.get()
+        # Only the author query behind the conditional GET check is left.
+        with self.assertNumQueries(1):
+            response = self.get()
+        self.assertEqual(len(response.context['author_books']), 2)
+        local_cache.clear()
+        with self.assertNumQueries(1):
+            self.assertContains(
+                self.get(),
+                'Genre 0, Genre 1, Genre 2',
+                count=2,
+            )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.filter(author=self.author).first().genre.clear()
+        response = self.get()
+        self.assertContains(response, 'Genre 0, Genre 1, Genre 2', count=1)
+
+    def test_genres_rendered_for_each_book(self):
+        self.add_books(2)
+        response = self.get()
+        self.assertContains(response, 'Genre 0, Genre 1, Genre 2', count=2)
+
+
+class RequestMetricsTest(TestCase):
+    def setUp(self):
+        registry.reset()
+        Author.objects.create(name='Metrics Author')
+
+    def test_records_histograms_per_url_name(self):
+        self.client.get('/en/catalog/authors/')
+        self.client.get('/en/catalog/authors/')
+
+        staff = User.objects.create_user('staff', password='pw')
+        staff.is_staff = True
+        staff.save()
+        self.client.force_login(staff)
+        response = self.client.get('/metrics/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], PROMETHEUS_CONTENT_TYPE)
+        body = response.content.decode()
+        self.assertIn(
+            'catalog_request_queries_count{view="author-list"} 2', body,
+        )
+        self.assertIn(
+            'catalog_request_queries_bucket{view="author-list",le="5"} 2',
+            body,
+        )
+        self.assertIn(
+            'catalog_request_render_seconds_count{view="author-list"} 2',
+            body,
+        )
+
+    async def test_records_async_requests(self):
+        await AsyncClient().get('/en/catalog/authors/')
+        body = registry.render()
+        self.assertIn(
+            'catalog_request_queries_count{view="author-list"} 1', body,
+        )
+        # The page's queries are counted though they run in a sync thread.
+        self.assertIn(
+            'catalog_request_queries_bucket{view="author-list",le="1"} 0',
+            body,
+        )
+
+    def test_metrics_endpoint_requires_staff(self):
+        user = User.objects.create_user('patron', password='pw')
+        self.client.force_login(user)
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 302)
+
+
+class ImportCatalogCommandTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        Book.objects.create(
+            title='Already Here', summary='Summary', ISBN='9780000000000',
+        )
+
+    def write(self, name, content):
+        path = Path(self.tmpdir.name) / name
+        path.write_text(content, encoding='utf-8')
+        return str(path)
+
+    def test_imports_books_and_copies(self):
+        books = self.write(
+            'books.csv',
+            'title,author,summary,isbn,language,genre\n'
+            'Dune,Frank Herbert,Spice,9780441013593,English,'
+            'Science Fiction|Classic\n'
+            'Dune Messiah,Frank Herbert,More spice,9780441172696,English,'
+            'Science Fiction\n'
+            'Duplicate,Nobody,Skipped,9780441013593,English,\n'
+            'Existing,Nobody,Skipped,9780000000000,English,\n',
+        )
+        copies = self.write(
+            'copies.ndjson',
+            '{"isbn": "9780441013593", "status": "a", "imprint": "Ace"}\n'
+            '{"isbn": "9780441013593", "status": "o",'
+            ' "due_back": "2030-01-01"}\n'
+            '{"isbn": "9780441172696"}\n'
+            '{"isbn": "0000000000000", "status": "a"}\n',
+        )
+        out = io.StringIO()
+        call_command(
+            'import_catalog', books=books, copies=copies, batch_size=2,
+            stdout=out,
+        )
+
+        self.assertIn('books: 2 created, 2 skipped', out.getvalue())
+        self.assertIn('copies: 3 created, 1 skipped', out.getvalue())
+        dune = Book.objects.get(ISBN='9780441013593')
+        self.assertEqual(dune.author.name, 'Frank Herbert')
+        self.assertEqual(dune.language.name, 'English')
+        self.assertEqual(
+            sorted(dune.genre.values_list('name', flat=True)),
+            ['Classic', 'Science Fiction'],
+        )
+        self.assertEqual(Author.objects.filter(name='Nobody').count(), 0)
+        self.assertEqual(dune.bookinstance_set.count(), 2)
+        on_loan = BookInstance.objects.get(due_back=datetime.date(2030, 1, 1))
+        self.assertEqual(on_loan.status, LoanStatusEnum.ON_LOAN.code)
+
+        stats = LibraryStats.objects.get()
+        self.assertEqual(stats.num_books, 3)
+        self.assertEqual(stats.num_instances, 3)
+        self.assertEqual(stats.num_instances_available, 1)
+        self.assertEqual(list(search_books('messiah')), [
+            Book.objects.get(ISBN='9780441172696'),
+        ])
+
+    def test_invalid_dates_skip_the_record(self):
+        authors = self.write(
+            'authors.csv',
+            'name,date_of_birth,date_of_death\n'
+            'Valid Author,1920-10-08,\n'
+            'Impossible Author,1920-13-01,\n'
+            'Malformed Author,08/10/1920,\n',
+        )
+        books = self.write(
+            'books.csv',
+            'title,author,summary,isbn,language,genre\n'
+            'Dune,Valid Author,Spice,9780441013593,,\n',
+        )
+        copies = self.write(
+            'copies.ndjson',
+            '{"isbn": "9780441013593", "status": "o",'
+            ' "due_back": "2030-13-01"}\n'
+            '{"isbn": "9780441013593", "status": "o",'
+            ' "due_back": "2030-01-01"}\n',
+        )
+        out = io.StringIO()
+        call_command(
+            'import_catalog', authors=authors, books=books, copies=copies,
+            stdout=out,
+        )
+
+        self.assertIn('authors: 1 created, 2 skipped', out.getvalue())
+        self.assertIn('copies: 1 created, 1 skipped', out.getvalue())
+        self.assertEqual(
+            Author.objects.get().date_of_birth,
+            datetime.date(1920, 10, 8),
+        )
+        self.assertEqual(
+            BookInstance.objects.get().due_back,
+            datetime.date(2030, 1, 1),
+        )
+
+    def test_imports_named_lookups_without_duplicates(self):
+        authors = self.write(
+            'authors.ndjson',
+            '{"name": "Ursula K. Le Guin", "date_of_birth": "1929-10-21"}\n'
+            '{"name": "Ursula K. Le Guin"}\n',
+        )
+        genres = self.write('genres.csv', 'name\nFantasy\nFantasy\n')
+        call_command(
+            'import_catalog', authors=authors, genres=genres,
+            stdout=io.StringIO(),
+        )
+        author = Author.objects.get(name='Ursula K. Le Guin')
+        self.assertEqual(author.date_of_birth, datetime.date(1929, 10, 21))
+        self.assertEqual(Genre.objects.filter(name='Fantasy').count(), 1)
+
+    def test_rejects_unknown_format(self):
+        path = self.write('books.xml', '<books/>')
+        with self.assertRaises(CommandError):
+            call_command('import_catalog', books=path, stdout=io.StringIO())
+
+
+class WarmupCommandTest(TestCase):
+    def test_phases_are_timed(self):
+        out = io.StringIO()
+        call_command('warmup', 'models', 'urls', 'templates', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(
+            [line.split()[0] for line in lines[:-1]],
+            ['models', 'urls', 'templates'],
+        )
+        self.assertIn('0 failed', lines[2])
+        self.assertIn('Warmed up in', lines[-1])
+
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('base_generic.html', loader.get_template_cache)
+        self.assertIn(
+            'catalog/book_list.html',
+            loader.get_template_cache,
+        )
+
+    def test_unknown_phase(self):
+        with self.assertRaises(CommandError):
+            call_command('warmup', 'bogus', stdout=io.StringIO())
+
+
+class StaticFilesTest(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        override = override_settings(STATIC_ROOT=root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.root = Path(root.name)
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        url = static('css/bootstrap.min.css')
+        self.assertRegex(
+            url,
+            r'^/static/css/bootstrap\.min\.[0-9a-f]{12}\.css$',
+        )
+        hashed = self.root / url.removeprefix('/static/')
+        self.assertTrue(Path(f'{hashed}.gz').is_file())
+        self.assertEqual(
+            gzip.decompress(Path(f'{hashed}.gz').read_bytes()),
+            hashed.read_bytes(),
+        )
+
+    def test_serves_precompressed_variant(self):
+        url = static('css/bootstrap.min.css')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertNotIn('Content-Disposition', response)
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(
+            body,
+            (self.root / url.removeprefix('/static/')).read_bytes(),
+        )
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', response)
+        response.close()
+
+    async def test_serves_async(self):
+        url = static('css/bootstrap.min.css')
+        response = await AsyncClient().get(
+            url,
+            headers={'Accept-Encoding': 'gzip'},
+        )
+        self.assertTrue(response.is_async)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = b''.join([
+            chunk async for chunk in response.streaming_content
+        ])
+        self.assertEqual(
+            gzip.decompress(body),
+            (self.root / url.removeprefix('/static/')).read_bytes(),
+        )
+
+    def test_unhashed_names_are_not_immutable(self):
+        response = self.client.get('/static/css/catalog.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response.close()
+
+        response = self.client.get(
+            '/static/css/catalog.css',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={STATIC_MAX_AGE}',
+        )
+        self.assertIn('Last-Modified', response)
+
+    def test_missing_files_fall_through(self):
+        response = self.client.get('/static/css/missing.css')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIsInstance(response, FileResponse)
+
+
+class CatalogExportTest(TestCase):
+    def setUp(self):
+        self.patron = User.objects.create_user('patron', password='pw')
+        author = Author.objects.create(name='Export Author')
+        self.book = Book.objects.create(
+            title='Export, "Quoted"',
+            author=author,
+            summary='Summary',
+            ISBN='9780000000042',
+        )
+        self.book.genre.set([
+            Genre.objects.create(name='Mystery'),
+            Genre.objects.create(name='Fantasy'),
+        ])
+        BookInstance.objects.create(
+            book=self.book,
+            status=LoanStatusEnum.ON_LOAN.code,
+            due_back=datetime.date(2030, 1, 2),
+            borrower=self.patron,
+        )
+        BookInstance.objects.create(
+            book=self.book,
+            status=LoanStatusEnum.AVAILABLE.code,
+        )
+
+    def export(self, dataset, fmt):
+        staff = User.objects.create_user('staff', password='pw')
+        staff.is_staff = True
+        staff.save()
+        self.client.force_login(staff)
+        response = self.client.get(f'/en/catalog/export/{dataset}.{fmt}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_books_csv_resolves_joins(self):
+        rows = list(csv.reader(io.StringIO(self.export('books', 'csv'))))
+        self.assertEqual(
+            rows[0],
+            ['id', 'title', 'author', 'summary', 'isbn', 'language', 'genre'],
+        )
+        self.assertEqual(rows[1][1:5], [
+            'Export, "Quoted"', 'Export Author', 'Summary', '9780000000042',
+        ])
+        self.assertEqual(rows[1][6], 'Fantasy|Mystery')
+
+    def test_books_export_round_trips_through_import(self):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.ndjson', encoding='utf-8', delete=False,
+        ) as handle:
+            handle.write(self.export('books', 'ndjson'))
+        self.addCleanup(Path(handle.name).unlink)
+        BookInstance.objects.all().delete()
+        self.book.delete()
+        call_command('import_catalog', books=handle.name, stdout=io.StringIO())
+        book = Book.objects.get(ISBN='9780000000042')
+        self.assertEqual(
+            sorted(book.genre.values_list('name', flat=True)),
+            ['Fantasy', 'Mystery'],
+        )
+
+    def test_loans_ndjson_only_contains_current_loans(self):
+        lines = self.export('loans', 'ndjson').splitlines()
+        self.assertEqual(len(lines), 1)
+        loan = json.loads(lines[0])
+        self.assertEqual(loan['borrower'], 'patron')
+        self.assertEqual(loan['due_back'], '2030-01-02')
+
+    def test_export_requires_staff(self):
+        self.client.force_login(self.patron)
+        response = self.client.get('/en/catalog/export/copies.csv')
+        self.assertEqual(response.status_code, 302)
+
+    def test_command_writes_copies(self):
+        out = io.StringIO()
+        call_command('export_catalog', 'copies', format='ndjson', stdout=out)
+        copies = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(copies), 2)
+        self.assertEqual({c['isbn'] for c in copies}, {'9780000000042'})
+
+
+class HotQueryIndexTest(TestCase):
+    def test_hot_queries_use_indexes(self):
+        seed_catalog(2000, seed=1)
+        analyze()
+        for name, plan, uses_index in explain_hot_queries():
+            self.assertTrue(uses_index, f'{name}:\n{plan}')
+
+    def test_unsupported_backend(self):
+        with mock.patch.object(connection, 'vendor', 'oracle'):
+            with self.assertRaisesMessage(ValueError, 'oracle'):
+                explain_hot_queries()
+
+
+class BookDetailCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name='Cached Author')
+        self.genre = Genre.objects.create(name='Cached Genre')
+        self.book = Book.objects.create(
+            title='Cached Book',
+            author=self.author,
+            summary='Summary',
+            ISBN='9780000000099',
+        )
+        self.book.genre.add(self.genre)
+        self.copy = BookInstance.objects.create(
+            book=self.book,
+            status=LoanStatusEnum.AVAILABLE.code,
+        )
+        self.url = f'/en/catalog/book/{self.book.pk}/'
+
+    def test_repeat_views_run_no_queries(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.content, second.content)
+        self.assertContains(second, 'Cached Book')
+
+    def test_copy_changes_invalidate_availability(self):
+        self.assertContains(self.client.get(self.url), 'Available')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.copy.status = LoanStatusEnum.ON_LOAN.code
+            self.copy.due_back = datetime.date(2030, 5, 6)
+            self.copy.save()
+        self.assertContains(self.client.get(self.url), '2030-05-06')
+
+    def test_related_changes_invalidate_page(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.name = 'Renamed Author'
+            self.author.save()
+        self.assertContains(self.client.get(self.url), 'Renamed Author')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.genre.name = 'Renamed Genre'
+            self.genre.save()
+        self.assertContains(self.client.get(self.url), 'Renamed Genre')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.genre.clear()
+        self.assertNotContains(self.client.get(self.url), 'Renamed Genre')
+
+    def test_missing_book_is_404(self):
+        response = self.client.get('/en/catalog/book/999999/')
+        self.assertEqual(response.status_code, 404)
+
+
+class ViewBenchmarkTest(TestCase):
+    def setUp(self):
+        seed_catalog(200, seed=2)
+        self.client.force_login(
+            User.objects.create_superuser('bench', password=None),
+        )
+
+    def test_every_catalog_url_is_benchmarked(self):
+        with translation.override('en'):
+            urls = dict(catalog_urls(sample_objects()))
+        named = {pattern.name for pattern in catalog_urlpatterns} - set(
+            BENCHMARK_POST_ONLY_URLS,
+        )
+        self.assertEqual(set(urls), named)
+        for name, url in urls.items():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, name)
+
+    def test_benchmark_url_reports_stats_queries_and_memory(self):
+        stats, extra = benchmark_url(self.client, '/en/catalog/authors/', 3)
+        self.assertEqual(stats['rounds'], 3)
+        self.assertLessEqual(stats['min'], stats['median'])
+        self.assertLessEqual(stats['median'], stats['max'])
+        self.assertEqual(extra['status_code'], 200)
+        self.assertGreater(extra['queries'], 0)
+        self.assertGreater(extra['peak_memory_bytes'], 0)
+
+
+class VisitTrackingTest(TestCase):
+    url = '/en/catalog/'
+
+    @override_settings(CATALOG_VISIT_TRACKING='cookie')
+    def test_cookie_mode_never_touches_the_session(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url)
+        self.assertEqual(first.context['num_visits'], 1)
+        self.assertEqual(second.context['num_visits'], 2)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, second.cookies)
+        self.assertEqual(Session.objects.count(), 0)
+
+    @override_settings(CATALOG_VISIT_TRACKING='cookie')
+    def test_cookie_mode_ignores_tampered_cookie(self):
+        self.client.cookies['num_visits'] = '99'
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['num_visits'], 1)
+
+    @override_settings(
+        CATALOG_VISIT_TRACKING='session',
+        SESSION_ENGINE='django.contrib.sessions.backends.db',
+    )
+    def test_session_mode_keeps_old_behaviour(self):
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['num_visits'], 2)
+        self.assertEqual(Session.objects.count(), 1)
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+class PurgeSessionsCommandTest(TestCase):
+    def test_deletes_only_expired_sessions_in_batches(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(
+                session_key=f'expired{i}',
+                session_data='',
+                expire_date=now - datetime.timedelta(days=1),
+            )
+        Session.objects.create(
+            session_key='live',
+            session_data='',
+            expire_date=now + datetime.timedelta(days=1),
+        )
+        out = io.StringIO()
+        call_command('purge_sessions', batch_size=2, stdout=out)
+        self.assertIn('Deleted 5 expired sessions.', out.getvalue())
+        self.assertEqual(
+            list(Session.objects.values_list('pk', flat=True)), ['live'],
+        )
+
+
+class OverdueLoansTest(TestCase):
+    url = '/en/catalog/overdue/'
+
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name='Late Author')
+        cls.book = Book.objects.create(
+            title='Late Book',
+            author=author,
+            summary='Summary',
+            ISBN='9780000000123',
+        )
+        cls.borrower = User.objects.create_user('late', password='pw12345!')
+        cls.librarian = User.objects.create_user(
+            'librarian',
+            password='pw12345!',
+        )
+        cls.librarian.user_permissions.add(
+            Permission.objects.get(codename='can_mark_returned'),
+        )
+        today = datetime.date.today()
+        cls.late = [
+            BookInstance.objects.create(
+                book=cls.book,
+                status=LoanStatusEnum.ON_LOAN.code,
+                due_back=today - datetime.timedelta(days=days),
+                borrower=cls.borrower,
+            )
+            for days in (3, 1)
+        ]
+        cls.due_today = BookInstance.objects.create(
+            book=cls.book,
+            status=LoanStatusEnum.ON_LOAN.code,
+            due_back=today,
+            borrower=cls.borrower,
+        )
+        cls.returned = BookInstance.objects.create(
+            book=cls.book,
+            status=LoanStatusEnum.AVAILABLE.code,
+            due_back=today - datetime.timedelta(days=5),
+        )
+
+    def test_annotation_matches_property(self):
+        annotated = {
+            copy.pk: copy.overdue_flag
+            for copy in BookInstance.objects.with_overdue()
+        }
+        self.assertEqual(
+            {copy.pk: copy.is_overdue
+             for copy in BookInstance.objects.with_overdue()},
+            annotated,
+        )
+        for copy in BookInstance.objects.all():
+            self.assertIs(annotated[copy.pk], copy.is_overdue)
+
+    def test_overdue_filter(self):
+        self.assertEqual(
+            list(BookInstance.objects.overdue().order_by('due_back')),
+            self.late,
+        )
+
+    def test_requires_permission(self):
+        self.client.force_login(self.borrower)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_lists_overdue_loans_in_one_query(self):
+        self.client.force_login(self.librarian)
+        response = self.client.get(self.url)
+        self.assertEqual(
+            list(response.context['bookinstance_list']),
+            self.late,
+        )
+        with self.assertNumQueries(0):
+            for copy in response.context['bookinstance_list']:
+                copy.book.title
+                copy.borrower.username
+
+
+class AsyncViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(60, num_books=25, num_authors=3, seed=2)
+
+    def setUp(self):
+        cache.clear()
+        with translation.override('en'):
+            self.urls = read_urls(sample_objects(), async_views)
+
+    async def aget(self, url):
+        with override_settings(ROOT_URLCONF=read_urlconf(async_views)):
+            return await AsyncClient().get(url)
+
+    def sync_get(self, url):
+        with override_settings(ROOT_URLCONF=read_urlconf(views)):
+            return Client().get(url)
+
+    async def test_async_views_render_like_sync_views(self):
+        self.assertEqual(len(self.urls), 5)
+        for name, url in self.urls:
+            for query in ('', '?page=2', '?page=last', '?cursor='):
+                with self.subTest(name=name, query=query):
+                    cache.clear()
+                    expected = await sync_to_async(self.sync_get)(url + query)
+                    cache.clear()
+                    response = await self.aget(url + query)
+                    self.assertEqual(
+                        response.status_code,
+                        expected.status_code,
+                    )
+                    self.assertEqual(response.content, expected.content)
+
+    async def test_invalid_pages_are_not_found(self):
+        for query in ('?page=99', '?page=x', '?cursor=bogus'):
+            with self.subTest(query=query):
+                response = await self.aget('/en/catalog/books/' + query)
+                self.assertEqual(response.status_code, 404)
+
+    async def test_missing_objects_are_not_found(self):
+        response = await self.aget('/en/catalog/author/999999/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_throughput_helpers(self):
+        name, url = self.urls[0]
+        with override_settings(ROOT_URLCONF=read_urlconf(views)):
+            rps, statuses = wsgi_throughput(url, 3, 1)
+        self.assertGreater(rps, 0)
+        self.assertEqual(statuses, {200})
+        with override_settings(ROOT_URLCONF=read_urlconf(async_views)):
+            rps, statuses = async_to_sync(asgi_throughput)(url, 4, 2)
+        self.assertGreater(rps, 0)
+        self.assertEqual(statuses, {200})
+
+
+class CatalogApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Api Author')
+        cls.books = [
+            Book.objects.create(
+                title=f'Api Book {i}',
+                author=cls.author,
+                summary='Summary',
+                ISBN=f'97800000002{i:02d}',
+            )
+            for i in range(5)
+        ]
+        cls.copy = BookInstance.objects.create(
+            book=cls.books[0],
+            status=LoanStatusEnum.AVAILABLE.code,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_projection_and_sparse_fields(self):
+        response = self.client.get('/api/books/', {'fields': 'id,title'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['results'][0],
+            {'id': self.books[0].pk, 'title': 'Api Book 0'},
+        )
+        response = self.client.get('/api/books/', {'fields': 'title,nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pages(self):
+        titles = []
+        url = '/api/books/?limit=2&fields=title'
+        while url:
+            data = self.client.get(url).json()
+            titles += [row['title'] for row in data['results']]
+            url = data['next']
+        self.assertEqual(titles, [book.title for book in self.books])
+        self.assertEqual(self.client.get('/api/books/?limit=0').status_code,
+                         400)
+
+    def test_availability_and_detail(self):
+        data = self.client.get('/api/availability/', {'limit': 1}).json()
+        self.assertEqual(
+            data['results'],
+            [{
+                'id': self.books[0].pk,
+                'title': 'Api Book 0',
+                'copies': 1,
+                'available': 1,
+            }],
+        )
+        response = self.client.get(f'/api/copies/{self.copy.pk}/')
+        self.assertEqual(response.json()['status'], 'a')
+        self.assertEqual(self.client.get('/api/copies/bad/').status_code, 404)
+        self.assertEqual(self.client.get('/api/nope/').status_code, 404)
+
+    def test_etag_revalidation_skips_queries(self):
+        response = self.client.get('/api/authors/')
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/api/authors/',
+                HTTP_IF_NONE_MATCH=etag,
+            )
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.name = 'Renamed'
+            self.author.save()
+        response = self.client.get('/api/authors/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_repeat_requests_are_served_from_cache(self):
+        first = self.client.get('/api/availability/')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/availability/')
+        self.assertEqual(second.json(), first.json())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BookInstance.objects.create(
+                book=self.books[1],
+                status=LoanStatusEnum.AVAILABLE.code,
+            )
+        data = self.client.get('/api/availability/').json()
+        self.assertEqual(data['results'][1]['available'], 1)
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name='Dated Author')
+        self.book = Book.objects.create(
+            title='Dated Book',
+            author=self.author,
+            summary='Summary',
+            ISBN='9780000000311',
+        )
+        self.copy = BookInstance.objects.create(
+            book=self.book,
+            status=LoanStatusEnum.AVAILABLE.code,
+        )
+
+    def revalidate(self, url, response):
+        return self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+
+    def test_copy_changes_touch_their_book(self):
+        before = Book.objects.get(pk=self.book.pk).updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            self.copy.status = LoanStatusEnum.MAINTENANCE.code
+            self.copy.save()
+        self.assertGreater(
+            Book.objects.get(pk=self.book.pk).updated_at,
+            before,
+        )
+
+    def test_book_detail_revalidates_without_queries(self):
+        url = f'/en/catalog/book/{self.book.pk}/'
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.copy.imprint = 'Second printing'
+            self.copy.save()
+        self.assertContains(self.revalidate(url, response), 'Second printing')
+
+    def test_author_detail_tracks_its_books(self):
+        url = f'/en/catalog/author/{self.author.pk}/'
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.title = 'Retitled Book'
+            self.book.save()
+        self.assertContains(self.revalidate(url, response), 'Retitled Book')
+
+    def test_list_revalidates_and_notices_deletes(self):
+        url = '/en/catalog/authors/'
+        Author.objects.create(name='Short-lived Author')
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Author.objects.filter(name='Short-lived Author').get().delete()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    async def test_async_views_revalidate(self):
+        with override_settings(ROOT_URLCONF=read_urlconf(async_views)):
+            client = AsyncClient()
+            url = '/en/catalog/books/'
+            response = await client.get(url)
+            response = await client.get(
+                url,
+                headers={'if-none-match': response['ETag']},
+            )
+        self.assertEqual(response.status_code, 304)
+
+
+class BulkCirculationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name='Bulk Author')
+        cls.book = Book.objects.create(
+            title='Bulk Book',
+            author=author,
+            summary='Summary',
+            ISBN='9780000000411',
+        )
+        cls.borrower = User.objects.create_user('reader', password='pw')
+        cls.librarian = User.objects.create_user(
+            'bulk-librarian',
+            password='pw',
+            is_staff=True,
+        )
+        cls.librarian.user_permissions.add(
+            Permission.objects.get(codename='can_mark_returned'),
+            Permission.objects.get(codename='change_bookinstance'),
+        )
+
+    def setUp(self):
+        LibraryStats.rebuild()
+        self.loans = [
+            BookInstance.objects.create(
+                book=self.book,
+                status=LoanStatusEnum.ON_LOAN.code,
+                due_back=datetime.date.today(),
+                borrower=self.borrower,
+            )
+            for _ in range(3)
+        ]
+        self.shelved = BookInstance.objects.create(
+            book=self.book,
+            status=LoanStatusEnum.AVAILABLE.code,
+        )
+        self.missing = uuid.uuid4()
+        self.client.force_login(self.librarian)
+
+    def post(self, name, **data):
+        copies = [copy.pk for copy in self.loans] + [
+            self.shelved.pk,
+            self.missing,
+        ]
+        with translation.override('en'):
+            url = reverse(name)
+        return self.client.post(url, {'copies': copies, **data})
+
+    def test_bulk_renew_is_set_based(self):
+        renewal = datetime.date.today() + datetime.timedelta(weeks=2)
+        with self.captureOnCommitCallbacks(execute=True), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.post('bulk-renew-librarian', renewal_date=renewal)
+        copy_queries = [
+            q['sql'].split()[0]
+            for q in queries if 'catalog_bookinstance' in q['sql']
+        ]
+        # One locking SELECT and one UPDATE, whatever the batch size.
+        self.assertEqual(copy_queries, ['SELECT', 'UPDATE'])
+        result = response.context['result']
+        self.assertEqual(result.updated, [copy.pk for copy in self.loans])
+        self.assertEqual(set(result.failures), {self.shelved.pk, self.missing})
+        self.assertEqual(
+            set(BookInstance.objects.filter(
+                pk__in=result.updated,
+            ).values_list('due_back', flat=True)),
+            {renewal},
+        )
+
+    def test_bulk_renew_validates_date_once(self):
+        response = self.post(
+            'bulk-renew-librarian',
+            renewal_date=datetime.date.today() - datetime.timedelta(days=1),
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(
+            BookInstance.objects.exclude(
+                due_back=datetime.date.today(),
+            ).filter(status__exact=LoanStatusEnum.ON_LOAN.code).exists(),
+        )
+
+    def test_bulk_return_updates_stats(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post('bulk-return-librarian')
+        self.assertEqual(len(response.context['result'].updated), 3)
+        self.assertEqual(
+            LibraryStats.load().num_instances_available,
+            BookInstance.objects.filter(
+                status__exact=LoanStatusEnum.AVAILABLE.code,
+            ).count(),
+        )
+        self.assertFalse(
+            BookInstance.objects.filter(borrower=self.borrower).exists(),
+        )
+
+    def test_requires_permission(self):
+        self.client.force_login(self.borrower)
+        response = self.post('bulk-return-librarian')
+        self.assertEqual(response.status_code, 403)
+
+    def test_admin_actions(self):
+        url = '/en/admin/catalog/bookinstance/'
+        selected = [copy.pk for copy in self.loans]
+        response = self.client.post(url, {
+            'action': 'renew_selected',
+            '_selected_action': selected,
+        })
+        self.assertContains(response, 'renewal_date')
+
+        renewal = datetime.date.today() + datetime.timedelta(weeks=1)
+        self.client.post(url, {
+            'action': 'renew_selected',
+            '_selected_action': selected,
+            'apply': '1',
+            'renewal_date': renewal,
+        })
+        self.assertEqual(
+            BookInstance.objects.filter(due_back=renewal).count(),
+            3,
+        )
+
+        self.client.post(url, {
+            'action': 'return_selected',
+            '_selected_action': selected + [self.shelved.pk],
+        })
+        self.assertFalse(
+            BookInstance.objects.filter(
+                status__exact=LoanStatusEnum.ON_LOAN.code,
+            ).exists(),
+        )
+
+
+class AdminChangeListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'a@b.c', 'pw')
+        cls.genres = [
+            Genre.objects.create(name=f'Genre {i}') for i in range(3)
+        ]
+        cls.authors = [
+            Author.objects.create(name=f'Changelist Author {i}')
+            for i in range(2)
+        ]
+        cls.borrower = User.objects.create_user('changelist-reader')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_books(self, count):
+        for i in range(count):
+            book = Book.objects.create(
+                title=f'Changelist Book {Book.objects.count()}',
+                author=self.authors[i % 2],
+                summary='Summary',
+                ISBN=f'{Book.objects.count():013d}',
+            )
+            book.genre.set(self.genres)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_book_changelist_queries_do_not_grow_with_rows(self):
+        url = '/en/admin/catalog/book/'
+        self.add_books(2)
+        few = self.count_queries(url)
+        self.add_books(8)
+        self.assertEqual(self.count_queries(url), few)
+
+    def test_author_filter_is_autocomplete(self):
+        self.add_books(4)
+        response = self.client.get(
+            '/en/admin/catalog/book/',
+            {'author__id__exact': self.authors[0].pk},
+        )
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertContains(response, 'data-field-name="author"')
+        # Only the selected author is rendered, not the whole table.
+        self.assertContains(response, 'Changelist Author 0')
+        self.assertNotContains(response, 'Changelist Author 1')
+
+    def test_borrower_filter_is_autocomplete(self):
+        self.add_books(1)
+        copy = BookInstance.objects.create(
+            book=Book.objects.get(),
+            status=LoanStatusEnum.ON_LOAN.code,
+            borrower=self.borrower,
+        )
+        BookInstance.objects.create(book=copy.book)
+        response = self.client.get(
+            '/en/admin/catalog/bookinstance/',
+            {'borrower__id__exact': self.borrower.pk},
+        )
+        self.assertEqual(list(response.context['cl'].result_list), [copy])
+        self.assertContains(response, 'data-field-name="borrower"')
+
+    def test_inlines_are_paginated(self):
+        author = self.authors[0]
+        language = Language.objects.create(name='English')
+        for i in range(26):
+            Book.objects.create(
+                title=f'Inline Book {i:02d}',
+                author=author,
+                summary='Summary',
+                ISBN=f'{9780000001000 + i}',
+                language=language,
+            )
+        url = f'/en/admin/catalog/author/{author.pk}/change/'
+
+        def inline_titles(response):
+            formset = response.context['inline_admin_formsets'][0].formset
+            return [form.instance.title for form in formset.initial_forms]
+
+        response = self.client.get(url)
+        self.assertEqual(
+            inline_titles(response),
+            [f'Inline Book {i:02d}' for i in range(20)],
+        )
+        self.assertContains(response, '?book_set-page=2')
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        Book.objects.create(title='Extra Book', author=author)
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(url)
+        self.assertEqual(len(after), len(before))
+        response = self.client.get(url, {'book_set-page': 2})
+        self.assertEqual(
+            inline_titles(response),
+            [f'Inline Book {i:02d}' for i in range(20, 26)] + ['Extra Book'],
+        )
+
+        # Saving edits only the rows of the page that was shown.
+        books = list(Book.objects.filter(author=author).order_by('pk'))[20:26]
+        data = {
+            'name': author.name,
+            'book_set-TOTAL_FORMS': len(books),
+            'book_set-INITIAL_FORMS': len(books),
+            'book_set-MIN_NUM_FORMS': 0,
+            'book_set-MAX_NUM_FORMS': 1000,
+        }
+        for i, book in enumerate(books):
+            data.update({
+                f'book_set-{i}-id': book.pk,
+                f'book_set-{i}-author': author.pk,
+                f'book_set-{i}-title': book.title.upper(),
+                f'book_set-{i}-summary': book.summary,
+                f'book_set-{i}-language': language.pk,
+            })
+        response = self.client.post(f'{url}?book_set-page=2', data)
+        self.assertEqual(response.status_code, 302)
+        titles = Book.objects.values_list('title', flat=True)
+        self.assertEqual(
+            sum(title.startswith('INLINE BOOK') for title in titles),
+            6,
+        )
+
+    def test_count_is_estimated_past_the_limit(self):
+        self.add_books(5)
+        with mock.patch.object(
+            EstimatedCountPaginator, 'exact_count_limit', 3,
+        ):
+            paginator = EstimatedCountPaginator(Book.objects.order_by('pk'), 2)
+            self.assertFalse(paginator.count_is_estimate)
+            analyze()
+            self.assertEqual(paginator.count, 5)
+            self.assertTrue(paginator.count_is_estimate)
+            self.assertEqual(len(paginator.page(3)), 1)
+
+            # Pages past a stale estimate are still served.
+            self.add_books(2)
+            stale = EstimatedCountPaginator(Book.objects.order_by('pk'), 2)
+            self.assertEqual(stale.count, 5)
+            self.assertEqual(len(stale.page(4)), 1)
+
+            exact = EstimatedCountPaginator(Book.objects.order_by('pk')[:2], 2)
+            self.assertEqual(exact.count, 2)
+            self.assertFalse(exact.count_is_estimate)
+
+
+class CirculationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name='Desk Author')
+        cls.book = Book.objects.create(
+            title='Desk Book',
+            author=author,
+            summary='Summary',
+            ISBN='9780000000511',
+        )
+        cls.alice = User.objects.create_user('alice', password='pw')
+        cls.bob = User.objects.create_user('bob', password='pw')
+
+    def setUp(self):
+        self.copy = BookInstance.objects.create(
+            book=self.book,
+            status=LoanStatusEnum.AVAILABLE.code,
+        )
+        LibraryStats.rebuild()
+
+    def assertStatsConsistent(self):
+        self.assertEqual(
+            LibraryStats.load().num_instances_available,
+            BookInstance.objects.filter(
+                status__exact=LoanStatusEnum.AVAILABLE.code,
+            ).count(),
+        )
+
+    def test_checkout_and_return(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            checkout(self.copy.pk, self.alice)
+        self.copy.refresh_from_db()
+        self.assertEqual(self.copy.status, LoanStatusEnum.ON_LOAN.code)
+        self.assertEqual(self.copy.borrower, self.alice)
+        self.assertEqual(self.copy.due_back, default_due_back())
+        self.assertStatsConsistent()
+
+        with self.assertRaises(CirculationError):
+            checkout(self.copy.pk, self.bob)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return_copy(self.copy.pk)
+        self.copy.refresh_from_db()
+        self.assertEqual(self.copy.status, LoanStatusEnum.AVAILABLE.code)
+        self.assertIsNone(self.copy.borrower)
+        self.assertStatsConsistent()
+        with self.assertRaises(CirculationError):
+            return_copy(self.copy.pk)
+
+    def test_reserved_copy_only_lends_to_its_patron(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve(self.copy.pk, self.alice)
+        self.assertStatsConsistent()
+        with self.assertRaises(CirculationError):
+            checkout(self.copy.pk, self.bob)
+        with self.assertRaises(CirculationError):
+            checkout_any(self.book.pk, self.bob)
+        with self.captureOnCommitCallbacks(execute=True):
+            checkout(self.copy.pk, self.alice)
+        self.assertStatsConsistent()
+
+    def test_shared_rows_are_written_after_commit(self):
+        # Desks lending different copies must not queue on the stats row
+        # or the title's row, so the loan's transaction leaves them alone.
+        touched = Book.objects.get(pk=self.book.pk).updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            checkout_any(self.book.pk, self.alice)
+            self.assertEqual(LibraryStats.load().num_instances_available, 1)
+            self.assertEqual(
+                Book.objects.get(pk=self.book.pk).updated_at,
+                touched,
+            )
+        self.assertStatsConsistent()
+        self.assertGreater(
+            Book.objects.get(pk=self.book.pk).updated_at,
+            touched,
+        )
+
+    def test_unknown_copy(self):
+        with self.assertRaises(CirculationError):
+            checkout(uuid.uuid4(), self.alice)
+
+
+class HoldQueueTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name='Queue Author')
+        cls.book = Book.objects.create(
+            title='Popular Book',
+            author=author,
+            summary='Summary',
+            ISBN='9780000000611',
+        )
+        cls.other_book = Book.objects.create(
+            title='Quiet Book',
+            author=author,
+            summary='Summary',
+            ISBN='9780000000612',
+        )
+        cls.patrons = [
+            User.objects.create_user(name, password='pw')
+            for name in ('alice', 'bob', 'carol', 'dave')
+        ]
+
+    def setUp(self):
+        self.copies = [
+            BookInstance.objects.create(
+                book=self.book,
+                status=LoanStatusEnum.ON_LOAN.code,
+                borrower=self.patrons[3],
+                due_back=datetime.date.today(),
+            )
+            for _ in range(2)
+        ]
+        LibraryStats.rebuild()
+
+    def queue(self):
+        for patron in self.patrons[:3]:
+            place_hold(self.book.pk, patron)
+
+    def positions(self, patron):
+        return {
+            hold.book_id: hold.position for hold in queue_positions(patron)
+        }
+
+    def assertStatsConsistent(self):
+        self.assertEqual(
+            LibraryStats.load().num_instances_available,
+            BookInstance.objects.filter(
+                status__exact=LoanStatusEnum.AVAILABLE.code,
+            ).count(),
+        )
+
+    def assertReservedFor(self, copy, patron):
+        copy.refresh_from_db()
+        self.assertEqual(copy.status, LoanStatusEnum.RESERVED.code)
+        self.assertEqual(copy.borrower, patron)
+        self.assertEqual(Hold.objects.get(copy=copy).patron, patron)
+
+    def test_positions_follow_placement_order(self):
+        self.queue()
+        place_hold(self.other_book.pk, self.patrons[2])
+        place_hold(self.book.pk, self.patrons[1])
+        self.assertEqual(Hold.objects.count(), 4)
+        self.assertEqual(self.positions(self.patrons[0]), {self.book.pk: 1})
+        self.assertEqual(self.positions(self.patrons[1]), {self.book.pk: 2})
+        self.assertEqual(
+            self.positions(self.patrons[2]),
+            {self.book.pk: 3, self.other_book.pk: 1},
+        )
+
+    def test_return_goes_to_head_of_queue(self):
+        self.queue()
+        with self.captureOnCommitCallbacks(execute=True):
+            return_copy(self.copies[0].pk)
+        self.assertReservedFor(self.copies[0], self.patrons[0])
+        self.assertEqual(self.positions(self.patrons[0]), {})
+        self.assertEqual(self.positions(self.patrons[1]), {self.book.pk: 1})
+        self.assertStatsConsistent()
+
+        with self.assertRaises(CirculationError):
+            checkout(self.copies[0].pk, self.patrons[1])
+        checkout(self.copies[0].pk, self.patrons[0])
+
+    def test_bulk_return_serves_queue_in_order(self):
+        self.queue()
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_return([copy.pk for copy in self.copies])
+        self.assertReservedFor(self.copies[0], self.patrons[0])
+        self.assertReservedFor(self.copies[1], self.patrons[1])
+        self.assertEqual(self.positions(self.patrons[2]), {self.book.pk: 1})
+        self.assertStatsConsistent()
+
+    def test_return_without_holds_shelves_copy(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return_copy(self.copies[0].pk)
+        self.copies[0].refresh_from_db()
+        self.assertEqual(self.copies[0].status, LoanStatusEnum.AVAILABLE.code)
+        self.assertStatsConsistent()
+
+    def test_hold_on_shelved_copy_is_fulfilled_at_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return_copy(self.copies[0].pk)
+            hold = place_hold(self.book.pk, self.patrons[1])
+        self.assertIsNotNone(hold.fulfilled_at)
+        self.assertReservedFor(self.copies[0], self.patrons[1])
+        self.assertStatsConsistent()
+
+    def test_cancel_hold(self):
+        self.queue()
+        hold = Hold.objects.get(patron=self.patrons[0])
+        self.assertFalse(cancel_hold(hold.pk, self.patrons[1]))
+        self.assertTrue(cancel_hold(hold.pk, self.patrons[0]))
+        self.assertEqual(self.positions(self.patrons[1]), {self.book.pk: 1})
+
+    def test_cancel_fulfilled_hold_passes_copy_on(self):
+        self.queue()
+        with self.captureOnCommitCallbacks(execute=True):
+            return_copy(self.copies[0].pk)
+        hold = Hold.objects.get(copy=self.copies[0])
+        self.client.force_login(self.patrons[0])
+        cancel_url = f'/en/catalog/hold/{hold.pk}/cancel/'
+        response = self.client.get('/en/catalog/holds/')
+        self.assertContains(response, cancel_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(cancel_url)
+        self.assertRedirects(response, '/en/catalog/holds/')
+        self.assertFalse(Hold.objects.filter(pk=hold.pk).exists())
+        self.assertReservedFor(self.copies[0], self.patrons[1])
+        self.assertStatsConsistent()
+
+        # Once the copy is collected its hold can no longer be cancelled.
+        checkout(self.copies[0].pk, self.patrons[1])
+        hold = Hold.objects.get(copy=self.copies[0])
+        self.assertFalse(cancel_hold(hold.pk, self.patrons[1]))
+        self.copies[0].refresh_from_db()
+        self.assertEqual(self.copies[0].status, LoanStatusEnum.ON_LOAN.code)
+
+    def test_expired_reservations_pass_down_queue(self):
+        self.queue()
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_return([copy.pk for copy in self.copies])
+        BookInstance.objects.filter(pk=self.copies[0].pk).update(
+            due_back=datetime.date.today() - datetime.timedelta(days=1),
+        )
+        shelved = BookInstance.objects.create(
+            book=self.other_book,
+            status=LoanStatusEnum.AVAILABLE.code,
+        )
+        LibraryStats.rebuild()
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve(shelved.pk, self.patrons[3])
+            call_command('expire_reservations', stdout=out)
+        self.assertIn('Released 1 expired reservations.', out.getvalue())
+        self.assertReservedFor(self.copies[0], self.patrons[2])
+        self.assertReservedFor(self.copies[1], self.patrons[1])
+        shelved.refresh_from_db()
+        self.assertEqual(shelved.status, LoanStatusEnum.RESERVED.code)
+        self.assertEqual(self.positions(self.patrons[2]), {})
+        self.assertStatsConsistent()
+
+    def test_my_holds_page(self):
+        place_hold(self.book.pk, self.patrons[0])
+        self.client.force_login(self.patrons[1])
+        response = self.client.post(f'/en/catalog/book/{self.book.pk}/hold/')
+        self.assertRedirects(response, '/en/catalog/holds/')
+        response = self.client.get('/en/catalog/holds/')
+        self.assertContains(response, 'position 2 in the queue')
+
+        hold = Hold.objects.get(patron=self.patrons[0])
+        response = self.client.post(f'/en/catalog/hold/{hold.pk}/cancel/')
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Hold.objects.filter(pk=hold.pk).exists())
+
+
+class CirculationStressTest(TransactionTestCase):
+    desks = 8
+    copies = 5
+
+    def test_concurrent_desks_never_double_lend(self):
+        author = Author.objects.create(name='Popular Author')
+        book = Book.objects.create(
+            title='Popular Book',
+            author=author,
+            summary='Summary',
+            ISBN='9780000000611',
+        )
+        for _ in range(self.copies):
+            BookInstance.objects.create(
+                book=book,
+                status=LoanStatusEnum.AVAILABLE.code,
+            )
+        patrons = [
+            User.objects.create_user(f'patron{i}', password='pw')
+            for i in range(self.desks)
+        ]
+        LibraryStats.rebuild()
+        start = threading.Barrier(self.desks)
+
+        def desk(patron):
+            try:
+                start.wait()
+                return checkout_any(book.pk, patron)
+            except CirculationError:
+                return None
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.desks) as pool:
+            lent = [pk for pk in pool.map(desk, patrons) if pk is not None]
+
+        self.assertEqual(len(lent), self.copies)
+        self.assertEqual(len(set(lent)), self.copies)
+        loans = BookInstance.objects.filter(
+            status__exact=LoanStatusEnum.ON_LOAN.code,
+        )
+        self.assertEqual(
+            loans.values('borrower').distinct().count(),
+            self.copies,
+        )
+        self.assertEqual(LibraryStats.load().num_instances_available, 0)
+
+
+@override_settings(CATALOG_READ_REPLICAS=[DEFAULT_DB_ALIAS])
+class ReplicaRoutingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Replica Author')
+        cls.book = Book.objects.create(
+            title='Replica Book',
+            author=cls.author,
+            summary='Summary',
+            ISBN='9780000000711',
+        )
+        cls.user = User.objects.create_user('reader', password='pw')
+
+    def reads_from_replica(self, url):
+        # The "replica" is the primary itself, so watch the router's pick.
+        with mock.patch.object(
+            replicas.random,
+            'choice',
+            wraps=replicas.random.choice,
+        ) as choice:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return choice.called
+
+    def test_list_and_detail_pages_read_from_replicas(self):
+        self.assertTrue(self.reads_from_replica('/en/catalog/books/'))
+        self.assertTrue(
+            self.reads_from_replica(f'/en/catalog/author/{self.author.pk}/'),
+        )
+        self.assertFalse(self.reads_from_replica('/en/catalog/'))
+
+    def test_writer_reads_from_primary_for_a_while(self):
+        self.client.force_login(self.user)
+        response = self.client.post(f'/en/catalog/book/{self.book.pk}/hold/')
+        self.assertEqual(
+            response.cookies[REPLICA_PIN_COOKIE_NAME]['max-age'],
+            settings.CATALOG_REPLICA_PIN_SECONDS,
+        )
+        self.assertFalse(self.reads_from_replica('/en/catalog/holds/'))
+
+        del self.client.cookies[REPLICA_PIN_COOKIE_NAME]
+        self.assertTrue(self.reads_from_replica('/en/catalog/holds/'))
+
+    @override_settings(CATALOG_READ_REPLICAS=['replica1', 'replica2'])
+    def test_router(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Book))
+        with routing_state() as state:
+            self.assertIsNone(router.db_for_read(Book))
+            state.enable_replica_reads()
+            self.assertIn(state.replica, ['replica1', 'replica2'])
+            # Every read of the request goes to the same replica.
+            self.assertEqual(
+                {router.db_for_read(Book) for _ in range(20)},
+                {state.replica},
+            )
+            self.assertEqual(router.db_for_write(Book), DEFAULT_DB_ALIAS)
+            self.assertTrue(state.wrote)
+        self.assertFalse(router.allow_migrate('replica', 'catalog'))
+        self.assertIsNone(router.allow_migrate(DEFAULT_DB_ALIAS, 'catalog'))
+
+
+@override_settings(CATALOG_READ_REPLICAS=['replica'])
+class ReplicaDatabaseTest(TransactionTestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        # A second connection to the test database stands in for a
+        # replica. It cannot see uncommitted rows, hence no TestCase.
+        connections.settings['replica'] = {
+            **connections[DEFAULT_DB_ALIAS].settings_dict,
+            'TEST': {'MIRROR': DEFAULT_DB_ALIAS},
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+
+    def test_pages_are_read_from_the_replica(self):
+        Book.objects.create(
+            title='Replicated Book',
+            summary='Summary',
+            ISBN='9780000000712',
+        )
+        response = self.client.get('/en/catalog/books/')
+        self.assertEqual(response.context['book_list'][0]._state.db, 'replica')
+
+
+class QueryCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return ['result']
+
+    def query(self):
+        return cached_query('test', [Genre], self.compute, key=('a',))
+
+    def test_both_tiers_until_a_version_bump(self):
+        self.assertEqual(self.query(), ['result'])
+        self.query()
+        self.assertEqual(self.calls, 1)
+
+        local_cache.clear()
+        self.assertEqual(self.query(), ['result'])
+        self.assertEqual(self.calls, 1)
+
+        bump_versions([model_scope(Genre)])
+        self.query()
+        self.assertEqual(self.calls, 2)
+
+    def test_local_tier_is_bounded(self):
+        for i in range(local_cache.max_entries + 1):
+            cached_query('test', [Genre], self.compute, key=(i,))
+        local_cache.set('newest', 1, 60)
+        self.assertEqual(len(local_cache._entries), local_cache.max_entries)
+
+    def test_concurrent_misses_compute_once(self):
+        def slow_compute():
+            self.calls += 1
+            time.sleep(0.05)
+            return 'slow'
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(
+                lambda _: cached_query('slow', [Genre], slow_compute),
+                range(8),
+            ))
+        self.assertEqual(results, ['slow'] * 8)
+        self.assertEqual(self.calls, 1)
@@ -1,40 +1,107 @@
 from __future__ import annotations
 
+from django.conf import settings
 from django.urls import path
 
+from . import async_views
 from . import views
 
-urlpatterns = [
-    path('', views.index, name='index'),
-    path('books/', views.BookListView.as_view(), name='book-list'),
-    path('book/<int:pk>/', views.BookDetailView.as_view(), name='book-detail'),
-    path(
-        'authors/',
-        views.AuthorListView.as_view(),
-        name='author-list',
-    ),
-    path(
-        'author/<int:pk>/',
-        views.AuthorDetailView.as_view(),
-        name='author-detail',
-    ),
-    path(
-        'mybooks/',
-        views.LoanedBooksByUserListView.as_view(),
-        name='my-borrowed',
-    ),
-    path(
-        'book/<uuid:pk>/renew/',
-        views.renew_book_librarian,
-        name='renew-book-librarian',
-    ),
-    path('author/create/', views.AuthorCreate.as_view(), name='author-create'),
-    path(
-        'author/<int:pk>/update/',
-        views.AuthorUpdate.as_view(), name='author-update',
-    ),
-    path(
-        'author/<int:pk>/delete/',
-        views.AuthorDelete.as_view(), name='author-delete',
-    ),
-]
+
+def read_urlpatterns(read_views):
+    """Routes for the public read pages, served by ``read_views``."""
+    return [
+        path('', read_views.index, name='index'),
+        path(
+            'books/',
+            read_views.BookListView.as_view(),
+            name='book-list',
+        ),
+        path(
+            'book/<int:pk>/',
+            read_views.BookDetailView.as_view(),
+            name='book-detail',
+        ),
+        path(
+            'authors/',
+            read_views.AuthorListView.as_view(),
+            name='author-list',
+        ),
+        path(
+            'author/<int:pk>/',
+            read_views.AuthorDetailView.as_view(),
+            name='author-detail',
+        ),
+    ]
+
+
+def catalog_urlpatterns(read_views):
+    return read_urlpatterns(read_views) + [
+        path(
+            'books/search/',
+            views.BookSearchView.as_view(),
+            name='book-search',
+        ),
+        path(
+            'mybooks/',
+            views.LoanedBooksByUserListView.as_view(),
+            name='my-borrowed',
+        ),
+        path(
+            'holds/',
+            views.HoldsByUserListView.as_view(),
+            name='my-holds',
+        ),
+        path(
+            'book/<int:pk>/hold/',
+            views.place_hold_patron,
+            name='place-hold',
+        ),
+        path(
+            'hold/<int:pk>/cancel/',
+            views.cancel_hold_patron,
+            name='cancel-hold',
+        ),
+        path(
+            'overdue/',
+            views.OverdueLoansListView.as_view(),
+            name='overdue-loans',
+        ),
+        path(
+            'book/<uuid:pk>/renew/',
+            views.renew_book_librarian,
+            name='renew-book-librarian',
+        ),
+        path(
+            'loans/renew/',
+            views.bulk_renew_librarian,
+            name='bulk-renew-librarian',
+        ),
+        path(
+            'loans/return/',
+            views.bulk_return_librarian,
+            name='bulk-return-librarian',
+        ),
+        path(
+            'author/create/',
+            views.AuthorCreate.as_view(),
+            name='author-create',
+        ),
+        path(
+            'author/<int:pk>/update/',
+            views.AuthorUpdate.as_view(), name='author-update',
+        ),
+        path(
+            'author/<int:pk>/delete/',
+            views.AuthorDelete.as_view(), name='author-delete',
+        ),
+        path(
+            'export/<slug:dataset>.<slug:fmt>',
+            views.export_catalog,
+            name='catalog-export',
+        ),
+    ]
+
+
+urlpatterns = catalog_urlpatterns(
+    async_views if getattr(settings, 'CATALOG_ASYNC_VIEWS', False) else views,
+)
@@ -2,54 +2,129 @@ from __future__ import annotations
 
 import datetime
 
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.decorators import permission_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.core.cache import cache
+from django.core.paginator import InvalidPage
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.http import Http404
+from django.http import HttpResponse
 from django.http import HttpResponseRedirect
+from django.http import JsonResponse
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.shortcuts import redirect
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.urls import reverse_lazy
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+from django.utils.translation import gettext as _
 from django.views import generic
-
+from django.views.decorators.http import condition
+from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_safe
+
+from catalog.api import API_RESOURCES
+from catalog.api import ApiError
+from catalog.api import get_resource
+from catalog.api import list_resource
+from catalog.api import resource_etag
+from catalog.caching import book_detail_cache_key
+from catalog.caching import book_state_cache_key
+from catalog.caching import cached
+from catalog.caching import get_versions
+from catalog.caching import model_scope
+from catalog.circulation import bulk_renew
+from catalog.circulation import bulk_return
+from catalog.circulation import cancel_hold
+from catalog.circulation import place_hold
+from catalog.circulation import queue_positions
+from catalog.conditional import ConditionalGetMixin
+from catalog.conditional import start_of_today
 from catalog.constants import AUTHORS_PER_PAGE
+from catalog.constants import BOOK_DETAIL_CACHE_TIMEOUT
 from catalog.constants import BOOKS_PER_PAGE
 from catalog.constants import BORROWED_BOOKS_PER_PAGE
+from catalog.constants import KEYSET_CURSOR_PARAM
 from catalog.constants import LoanStatusEnum
+from catalog.constants import OVERDUE_LOANS_PER_PAGE
+from catalog.constants import PROMETHEUS_CONTENT_TYPE
+from catalog.constants import SEARCH_QUERY_PARAM
+from catalog.exports import EXPORT_FORMATS
+from catalog.exports import EXPORTS
+from catalog.exports import stream_export
 from catalog.forms import AuthorModelForm
+from catalog.forms import BulkRenewForm
+from catalog.forms import BulkReturnForm
 from catalog.forms import RenewBookForm
+from catalog.metrics import registry
 from catalog.models import Author
 from catalog.models import Book
 from catalog.models import BookInstance
+from catalog.models import Genre
+from catalog.models import Hold
+from catalog.models import LibraryStats
+from catalog.pagination import EstimatedCountPaginator
+from catalog.pagination import KeysetPaginationMixin
+from catalog.replicas import ReplicaReadMixin
+from catalog.search import search_books
+from catalog.visits import get_visit_count
+from catalog.visits import record_visit
+
+
+def changes_since(queryset, models, fields=('updated_at',), overdue=False):
+    """
+    ``(last_modified, versions)`` for ConditionalGetMixin: the newest
+    ``fields`` timestamp in one indexed MAX query, plus the model versions
+    that change on deletes, which no remaining timestamp reflects.
+    Overdue flags flip at midnight without any row changing.
+    """
+    state = queryset.order_by().aggregate(
+        *(Max(field) for field in fields),
+    )
+    last_modified = max(filter(None, state.values()), default=None)
+    if overdue:
+        last_modified = max(filter(None, (last_modified, start_of_today())))
+    versions = get_versions([model_scope(model) for model in models])
+    return last_modified, sorted(versions.values())
 
 
 def index(request):
-    num_book = Book.objects.count()
-    num_instances = BookInstance.objects.count()
-    num_instances_available = BookInstance.objects.filter(
-        status__exact=LoanStatusEnum.AVAILABLE.code,
-    ).count()
-    num_authors = Author.objects.count()
-
-    num_visits = request.session.get('num_visits', 1)
-    request.session['num_visits'] = num_visits + 1
+    stats = LibraryStats.load()
+    num_visits = get_visit_count(request)
 
     context = {
-        'num_book': num_book,
-        'num_instances': num_instances,
-        'num_instances_available': num_instances_available,
-        'num_authors': num_authors,
+        'num_book': stats.num_books,
+        'num_instances': stats.num_instances,
+        'num_instances_available': stats.num_instances_available,
+        'num_authors': stats.num_authors,
         'num_visits': num_visits,
     }
-    return render(request, 'index.html', context=context)
+    response = render(request, 'index.html', context=context)
+    record_visit(request, response, num_visits)
+    return response
 
 
-class BookListView(generic.ListView):
+class BookListView(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
+    generic.ListView,
+):
     model = Book
     context_object_name = 'book_list'
     template_name = 'catalog/book_list.html'
     paginate_by = BOOKS_PER_PAGE
+    paginator_class = EstimatedCountPaginator
+    keyset_ordering = ('title', 'id')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -58,11 +133,57 @@ class BookListView(generic.ListView):
     def get_queryset(self):
         return Book.objects.select_related('author').all()
 
+    def get_page_state(self):
+        # Author renames touch their books, so Book alone is enough.
+        return changes_since(Book.objects.all(), [Book])
 
-class BookDetailView(generic.DetailView):
+
+class BookSearchView(ReplicaReadMixin, generic.ListView):
+    model = Book
+    context_object_name = 'book_list'
+    template_name = 'catalog/book_search.html'
+    paginate_by = BOOKS_PER_PAGE
+
+    def get_query(self):
+        return self.request.GET.get(SEARCH_QUERY_PARAM, '').strip()
+
+    def get_queryset(self):
+        return search_books(
+            self.get_query(),
+            Book.objects.select_related('author'),
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.get_query()
+        return context
+
+
+# Not a ReplicaReadMixin view: its queries only run to fill caches shared
+# by every client, and a lagging replica would store a stale page under
+# the book's new version.
+class BookDetailView(ConditionalGetMixin, generic.DetailView):
     model = Book
     context_object_name = 'book'
     template_name = 'catalog/book_detail.html'
+    body_template_name = 'catalog/includes/book_detail_body.html'
+
+    def get(self, request, *args, **kwargs):
+        # The rendered body is cached under the book's current version, so
+        # repeat views run no SQL until a signal bumps that version.
+        key = book_detail_cache_key(self.kwargs['pk'], get_language())
+        body = cache.get(key)
+        if body is None:
+            self.object = self.get_object()
+            body = render_to_string(
+                self.body_template_name,
+                self.get_context_data(object=self.object),
+            )
+            cache.set(key, body, BOOK_DETAIL_CACHE_TIMEOUT)
+        return self.render_to_response({
+            'book_detail_body': mark_safe(body),
+            'book_pk': self.kwargs['pk'],
+        })
 
     def get_queryset(self):
         return Book.objects.select_related(
@@ -70,13 +191,28 @@ class BookDetailView(generic.DetailView):
             'language',
         ).prefetch_related('genre')
 
+    def get_page_state(self):
+        # Cached under the book's version, so repeat views stay query-free.
+        key = book_state_cache_key(self.kwargs[self.pk_url_kwarg])
+        state = cache.get(key)
+        if state is None:
+            updated_at = Book.objects.filter(
+                pk=self.kwargs[self.pk_url_kwarg],
+            ).values_list('updated_at', flat=True).first()
+            state = (updated_at, None)
+            cache.set(key, state, BOOK_DETAIL_CACHE_TIMEOUT)
+        return state
+
+    def get_book_instances(self):
+        return BookInstance.objects.filter(
+            book_id=self.kwargs[self.pk_url_kwarg],
+        ).order_by('status', 'due_back')
+
     def get_context_data(self, **kwargs):
+        if 'book_instances' not in kwargs:
+            kwargs['book_instances'] = list(self.get_book_instances())
         context = super().get_context_data(**kwargs)
-        book_instances = BookInstance.objects.filter(
-            book=self.object,
-        ).order_by('status', 'due_back')
-        context['book_instances'] = book_instances
-        context['has_copies'] = book_instances.exists()
+        context['has_copies'] = bool(context['book_instances'])
         context['LoanStatusEnum'] = LoanStatusEnum
         context['book_genres'] = list(self.object.genre.all())
         context['book_author'] = self.object.author
@@ -88,38 +224,177 @@ class BookDetailView(generic.DetailView):
         return render(request, 'catalog/book_detail.html', {'book': book})
 
 
-class LoanedBooksByUserListView(LoginRequiredMixin, generic.ListView):
+class LoanedBooksByUserListView(
+    LoginRequiredMixin,
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
+    generic.ListView,
+):
     model = BookInstance
     template_name = 'catalog/bookinstance_list_borrowed_user.html'
     context_object_name = 'bookinstance_list'
     paginate_by = BORROWED_BOOKS_PER_PAGE
+    paginator_class = EstimatedCountPaginator
+    keyset_ordering = ('due_back', 'uniqueId')
 
     def get_queryset(self):
         return BookInstance.objects.filter(
             borrower=self.request.user,
             status__exact=LoanStatusEnum.ON_LOAN.code,
-        ).order_by('due_back')
+        ).select_related('book').with_overdue().order_by('due_back')
+
+    def get_page_state(self):
+        return changes_since(
+            BookInstance.objects.filter(
+                borrower=self.request.user,
+                status__exact=LoanStatusEnum.ON_LOAN.code,
+            ),
+            [BookInstance, Book],
+            fields=('updated_at', 'book__updated_at'),
+            overdue=True,
+        )
+
+
+class HoldsByUserListView(
+    LoginRequiredMixin,
+    ReplicaReadMixin,
+    generic.ListView,
+):
+    template_name = 'catalog/hold_list_user.html'
+    context_object_name = 'hold_list'
 
+    def get_queryset(self):
+        return queue_positions(self.request.user)
 
-class AuthorListView(generic.ListView):
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Copies reserved through a hold can be given up with that hold.
+        context['ready_list'] = BookInstance.objects.filter(
+            borrower=self.request.user,
+            status__exact=LoanStatusEnum.RESERVED.code,
+        ).annotate(
+            hold_id=Subquery(
+                Hold.objects.filter(
+                    copy=OuterRef('pk'),
+                    patron=self.request.user,
+                ).values('pk')[:1],
+            ),
+        ).select_related('book').order_by('due_back')
+        return context
+
+
+@login_required
+@require_POST
+def place_hold_patron(request, pk):
+    book = get_object_or_404(Book, pk=pk)
+    place_hold(book.pk, request.user)
+    return redirect('my-holds')
+
+
+@login_required
+@require_POST
+def cancel_hold_patron(request, pk):
+    if not cancel_hold(pk, request.user):
+        raise Http404
+    return redirect('my-holds')
+
+
+class OverdueLoansListView(
+    LoginRequiredMixin,
+    PermissionRequiredMixin,
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
+    generic.ListView,
+):
+    model = BookInstance
+    permission_required = 'catalog.can_mark_returned'
+    template_name = 'catalog/bookinstance_list_overdue.html'
+    context_object_name = 'bookinstance_list'
+    paginate_by = OVERDUE_LOANS_PER_PAGE
+    keyset_ordering = ('due_back', 'uniqueId')
+
+    def get_queryset(self):
+        return BookInstance.objects.overdue().select_related(
+            'book',
+            'borrower',
+        ).order_by('due_back', 'uniqueId')
+
+    def get_page_state(self):
+        return changes_since(
+            BookInstance.objects.overdue(),
+            [BookInstance, Book],
+            fields=('updated_at', 'book__updated_at'),
+            overdue=True,
+        )
+
+
+class AuthorListView(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
+    generic.ListView,
+):
     model = Author
     context_object_name = 'author_list'
     template_name = 'catalog/author_list.html'
     paginate_by = AUTHORS_PER_PAGE
+    paginator_class = EstimatedCountPaginator
+    keyset_ordering = ('name', 'id')
 
     def get_queryset(self):
         return Author.objects.all().order_by('name')
 
+    def get_page_state(self):
+        return changes_since(Author.objects.all(), [Author])
 
-class AuthorDetailView(generic.DetailView):
+
+class AuthorDetailView(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    generic.DetailView,
+):
     model = Author
     context_object_name = 'author'
     template_name = 'catalog/author_detail.html'
 
+    def get_page_state(self):
+        # Loads the author together with its books' latest change, so the
+        # check replaces the usual author query instead of adding one.
+        self.object = self.get_queryset().filter(
+            pk=self.kwargs[self.pk_url_kwarg],
+        ).annotate(
+            books_updated_at=Max('book__updated_at'),
+            book_count=Count('book'),
+        ).first()
+        if self.object is None:
+            return None
+        return (
+            max(filter(None, (
+                self.object.updated_at,
+                self.object.books_updated_at,
+            ))),
+            self.object.book_count,
+        )
+
+    def get_object(self, queryset=None):
+        if queryset is None and getattr(self, 'object', None) is not None:
+            return self.object
+        return super().get_object(queryset)
+
+    @cached((Book, Genre), key=lambda view: (view.kwargs[view.pk_url_kwarg],))
+    def get_author_books(self):
+        return list(
+            Book.objects.filter(
+                author_id=self.kwargs[self.pk_url_kwarg],
+            ).prefetch_related('genre').order_by('title', 'id'),
+        )
+
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['author_books'] = Book.objects.filter(author=self.object)
-        return context
+        if 'author_books' not in kwargs:
+            kwargs['author_books'] = self.get_author_books()
+        return super().get_context_data(**kwargs)
 
 
 @login_required
@@ -146,6 +421,45 @@ def renew_book_librarian(request, pk):
     return render(request, 'catalog/book_renew_librarian.html', context)
 
 
+def render_bulk_result(request, form, title, result):
+    context = {
+        'form': form,
+        'title': title,
+        'result': result,
+    }
+    return render(
+        request,
+        'catalog/bookinstance_bulk_result.html',
+        context,
+        status=400 if result is None else 200,
+    )
+
+
+@login_required
+@permission_required('catalog.can_mark_returned', raise_exception=True)
+@require_POST
+def bulk_renew_librarian(request):
+    form = BulkRenewForm(request.POST)
+    result = None
+    if form.is_valid():
+        result = bulk_renew(
+            form.cleaned_data['copies'],
+            form.cleaned_data['renewal_date'],
+        )
+    return render_bulk_result(request, form, _('Renew copies'), result)
+
+
+@login_required
+@permission_required('catalog.can_mark_returned', raise_exception=True)
+@require_POST
+def bulk_return_librarian(request):
+    form = BulkReturnForm(request.POST)
+    result = None
+    if form.is_valid():
+        result = bulk_return(form.cleaned_data['copies'])
+    return render_bulk_result(request, form, _('Return copies'), result)
+
+
 class AuthorCreate(PermissionRequiredMixin, generic.CreateView):
     model = Author
     form_class = AuthorModelForm
@@ -166,3 +480,74 @@ class AuthorDelete(PermissionRequiredMixin, generic.DeleteView):
     template_name = 'catalog/author_confirm_delete.html'
     success_url = reverse_lazy('index')
     permission_required = 'catalog.delete_author'
+
+
+@staff_member_required
+def metrics(request):
+    return HttpResponse(
+        registry.render(),
+        content_type=PROMETHEUS_CONTENT_TYPE,
+    )
+
+
+@staff_member_required
+def export_catalog(request, dataset, fmt):
+    if dataset not in EXPORTS or fmt not in EXPORT_FORMATS:
+        raise Http404
+    response = StreamingHttpResponse(
+        stream_export(dataset, fmt),
+        content_type=EXPORT_FORMATS[fmt],
+    )
+    response['Content-Disposition'] = \
+        f'attachment; filename="{dataset}.{fmt}"'
+    return response
+
+
+def api_etag(request, resource, pk=None):
+    if resource not in API_RESOURCES:
+        return None
+    return resource_etag(resource, request.GET, pk)
+
+
+def api_page_url(request, cursor):
+    params = request.GET.copy()
+    params[KEYSET_CURSOR_PARAM] = cursor
+    return f'{request.path}?{params.urlencode()}'
+
+
+@require_safe
+@condition(etag_func=api_etag)
+def api_resource_list(request, resource):
+    if resource not in API_RESOURCES:
+        raise Http404
+    try:
+        results, next_cursor, previous_cursor = list_resource(
+            resource,
+            request.GET,
+        )
+    except ApiError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except InvalidPage:
+        raise Http404
+    return JsonResponse({
+        'results': results,
+        'next': next_cursor and api_page_url(request, next_cursor),
+        'previous': previous_cursor and api_page_url(
+            request,
+            previous_cursor,
+        ),
+    })
+
+
+@require_safe
+@condition(etag_func=api_etag)
+def api_resource_detail(request, resource, pk):
+    if resource not in API_RESOURCES:
+        raise Http404
+    try:
+        result = get_resource(resource, pk, request.GET)
+    except ApiError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if result is None:
+        raise Http404
+    return JsonResponse(result)
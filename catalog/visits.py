@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from django.conf import settings
+
+from catalog.constants import VISITS_COOKIE_MAX_AGE
+from catalog.constants import VISITS_COOKIE_NAME
+from catalog.constants import VISITS_COOKIE_SALT
+from catalog.constants import VISITS_SESSION_KEY
+from catalog.constants import VisitTrackingEnum
+
+
+def tracking_mode():
+    return getattr(
+        settings,
+        'CATALOG_VISIT_TRACKING',
+        VisitTrackingEnum.SESSION.value,
+    )
+
+
+def get_visit_count(request):
+    if tracking_mode() == VisitTrackingEnum.SESSION.value:
+        return request.session.get(VISITS_SESSION_KEY, 1)
+    value = request.get_signed_cookie(
+        VISITS_COOKIE_NAME,
+        default='1',
+        salt=VISITS_COOKIE_SALT,
+    )
+    return int(value) if value.isdigit() else 1
+
+
+def record_visit(request, response, num_visits):
+    # The cookie mode keeps the counter client-side, so a homepage view
+    # never loads or saves a session row.
+    if tracking_mode() == VisitTrackingEnum.SESSION.value:
+        request.session[VISITS_SESSION_KEY] = num_visits + 1
+        return
+    response.set_signed_cookie(
+        VISITS_COOKIE_NAME,
+        num_visits + 1,
+        salt=VISITS_COOKIE_SALT,
+        max_age=VISITS_COOKIE_MAX_AGE,
+        httponly=True,
+        samesite='Lax',
+    )
+
+
+async def aget_visit_count(request):
+    if tracking_mode() == VisitTrackingEnum.SESSION.value:
+        return await request.session.aget(VISITS_SESSION_KEY, 1)
+    return get_visit_count(request)
+
+
+async def arecord_visit(request, response, num_visits):
+    if tracking_mode() == VisitTrackingEnum.SESSION.value:
+        await request.session.aset(VISITS_SESSION_KEY, num_visits + 1)
+        return
+    record_visit(request, response, num_visits)
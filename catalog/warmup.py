@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.template import TemplateDoesNotExist
+from django.template import TemplateSyntaxError
+from django.urls import get_resolver
+from django.urls import NoReverseMatch
+from django.urls import resolve
+from django.urls import reverse
+from django.urls import URLResolver
+from django.urls.converters import IntConverter
+from django.urls.converters import UUIDConverter
+from django.utils import formats
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+
+def warm_models():
+    models = apps.get_models(include_auto_created=True)
+    for model in models:
+        model._meta.get_fields()
+    return f'{len(models)} models'
+
+
+def warm_translations():
+    for code, _name in settings.LANGUAGES:
+        with translation.override(code):
+            formats.get_format('DATE_INPUT_FORMATS')
+    return f'{len(settings.LANGUAGES)} languages'
+
+
+def named_urls(patterns, namespace=None, converters=None):
+    """Yield ``(name, converters)`` for every named route, recursively."""
+    converters = converters or {}
+    for pattern in patterns:
+        scope = {**converters, **getattr(pattern.pattern, 'converters', {})}
+        if isinstance(pattern, URLResolver):
+            inner = namespace
+            if pattern.namespace:
+                inner = ':'.join(filter(None, [namespace, pattern.namespace]))
+            yield from named_urls(pattern.url_patterns, inner, scope)
+        elif pattern.name:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, scope
+
+
+def placeholder(converter):
+    if isinstance(converter, IntConverter):
+        return 1
+    if isinstance(converter, UUIDConverter):
+        return uuid.UUID(int=0)
+    return 'warmup'
+
+
+def warm_urls():
+    """
+    Reverse and resolve every named route in every language, which builds
+    the language-specific resolver caches of ``i18n_patterns``. Routes
+    whose regex rejects the placeholder arguments are skipped.
+    """
+    resolver = get_resolver()
+    routes = dict(named_urls(resolver.url_patterns))
+    resolved = skipped = 0
+    for code, _name in settings.LANGUAGES:
+        with translation.override(code):
+            for name, converters in routes.items():
+                kwargs = {
+                    key: placeholder(converter)
+                    for key, converter in converters.items()
+                }
+                try:
+                    resolve(reverse(name, kwargs=kwargs))
+                except NoReverseMatch:
+                    skipped += 1
+                    continue
+                resolved += 1
+    return f'{resolved} routes resolved, {skipped} skipped'
+
+
+def template_names(engine):
+    for loader in engine.engine.template_loaders:
+        for directory in loader.get_dirs():
+            root = Path(directory)
+            for path in sorted(root.rglob('*')):
+                if path.suffix in TEMPLATE_SUFFIXES:
+                    yield path.relative_to(root).as_posix()
+
+
+def warm_templates():
+    """
+    Compile every template into the cached loader. Names are looked up as
+    requests would, so overridden templates compile their override.
+    """
+    compiled = failed = 0
+    for engine in engines.all():
+        if not hasattr(engine, 'engine'):
+            continue
+        for name in dict.fromkeys(template_names(engine)):
+            try:
+                engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError):
+                failed += 1
+                continue
+            compiled += 1
+    return f'{compiled} templates compiled, {failed} failed'
+
+
+def warm_connections():
+    """
+    Open and check every database connection, which loads the drivers
+    and resolves hosts. The connections are closed again: a server may
+    fork its workers after warming up, and forks must not share them.
+    """
+    for alias in connections:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+    connections.close_all()
+    return ', '.join(connections)
+
+
+PHASES = {
+    'models': warm_models,
+    'translations': warm_translations,
+    'urls': warm_urls,
+    'templates': warm_templates,
+    'connections': warm_connections,
+}
+
+
+def warm_up(phases=None):
+    """
+    Pay a fresh worker's first-request costs up front. Runs the given
+    phases, all by default, and returns ``(phase, seconds, detail)`` for
+    each. Call it once Django is set up, e.g. from wsgi.py.
+    """
+    report = []
+    for phase in phases or PHASES:
+        started = time.perf_counter()
+        detail = PHASES[phase]()
+        elapsed = time.perf_counter() - started
+        logger.info('Warm-up %s: %.1f ms (%s)', phase, elapsed * 1000, detail)
+        report.append((phase, elapsed, detail))
+    return report
@@ -10,8 +10,14 @@ from __future__ import annotations
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
+from catalog.warmup import warm_up
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'locallibrary.settings')
 
 application = get_asgi_application()
+
+if settings.CATALOG_WARMUP:
+    warm_up()
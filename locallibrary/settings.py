@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from __future__ import annotations
 
 import os
+import tempfile
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -48,15 +49,29 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'catalog.middleware.StaticFilesMiddleware',
+    'catalog.middleware.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'catalog.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-view query/latency histograms served at /metrics/ (staff only).
+CATALOG_REQUEST_METRICS = os.getenv('CATALOG_REQUEST_METRICS', '1') == '1'
+
+# Serve the catalog read pages with the async views in
+# catalog/async_views.py; only worthwhile when deployed under ASGI.
+CATALOG_ASYNC_VIEWS = os.getenv('CATALOG_ASYNC_VIEWS', '0') == '1'
+
+# Run catalog.warmup.warm_up() when the WSGI/ASGI application loads, so
+# workers compile templates and URL resolvers before their first request.
+CATALOG_WARMUP = os.getenv('CATALOG_WARMUP', '0') == '1'
+
 ROOT_URLCONF = 'locallibrary.urls'
 
 TEMPLATES = [
@@ -89,6 +104,79 @@ DATABASES = {
         'PORT': os.environ['DB_PORT'],
     },
 }
+# SQLite tests use a file rather than memory: the concurrency tests need
+# one, since shared-cache memory databases fail on locks instead of
+# waiting for them. The name is per process so concurrent runs on one
+# machine do not destroy each other's database.
+if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+    DATABASES['default']['TEST'] = {
+        'NAME': os.path.join(
+            tempfile.gettempdir(),
+            f'test_locallibrary_{os.getpid()}.sqlite3',
+        ),
+    }
+
+# Read replicas, comma separated: database files for SQLite, host or
+# host:port otherwise. List and detail pages read from them (see
+# catalog/replicas.py); tests point them at the test primary. To try it
+# locally with SQLite, copy DB_NAME to a second file and list that here.
+DB_REPLICAS = [
+    replica.strip()
+    for replica in os.getenv('DB_REPLICAS', '').split(',')
+    if replica.strip()
+]
+for number, replica in enumerate(DB_REPLICAS, 1):
+    if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+        location = {'NAME': replica}
+    else:
+        location = dict(zip(('HOST', 'PORT'), replica.split(':')))
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        **location,
+        'TEST': {'MIRROR': 'default'},
+    }
+CATALOG_READ_REPLICAS = [
+    f'replica{number}' for number in range(1, len(DB_REPLICAS) + 1)
+]
+DATABASE_ROUTERS = ['catalog.replicas.ReplicaRouter']
+
+# Seconds a client keeps reading from the primary after it wrote, so it
+# sees its own changes however far the replicas lag behind.
+CATALOG_REPLICA_PIN_SECONDS = int(
+    os.getenv('CATALOG_REPLICA_PIN_SECONDS', '10'),
+)
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Multi-process deployments must point this at a shared backend
+# (Redis, Memcached, ...) so version bumps reach every worker. Query
+# results also sit in a small per-process LRU in front of it (see
+# catalog/caching.py). Tests use local memory; FileBasedCache with a
+# CACHE_LOCATION directory shares the cache between local processes.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+}
+
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+# cached_db reads sessions from the cache and only falls back to the
+# database on a miss; 'cache' or 'signed_cookies' avoid the table
+# entirely. Expired rows are removed by `manage.py purge_sessions`.
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+# 'cookie' keeps the homepage visit counter in a signed cookie so the
+# index page never writes a session; 'session' restores the old
+# behaviour.
+CATALOG_VISIT_TRACKING = os.getenv('CATALOG_VISIT_TRACKING', 'cookie')
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -143,6 +231,20 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# collectstatic writes content-hashed copies of every file here, with .gz
+# (and, with the brotli package, .br) variants that
+# catalog.middleware.StaticFilesMiddleware serves with immutable caching.
+STATIC_ROOT = os.getenv('STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'catalog.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -16,16 +16,27 @@ Including another URLconf
 """
 from __future__ import annotations
 
-from django.conf import settings
 from django.conf.urls.i18n import i18n_patterns
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include
 from django.urls import path
 from django.views.generic.base import RedirectView
 
+from catalog import views as catalog_views
+
 urlpatterns = [
     path('i18n/', include('django.conf.urls.i18n')),
+    path('metrics/', catalog_views.metrics, name='metrics'),
+    path(
+        'api/<slug:resource>/',
+        catalog_views.api_resource_list,
+        name='api-resource-list',
+    ),
+    path(
+        'api/<slug:resource>/<str:pk>/',
+        catalog_views.api_resource_detail,
+        name='api-resource-detail',
+    ),
 ]
 
 urlpatterns += i18n_patterns(
@@ -33,4 +44,4 @@ urlpatterns += i18n_patterns(
     path('accounts/', include('django.contrib.auth.urls')),
     path('catalog/', include('catalog.urls')),
     path('', RedirectView.as_view(url='catalog/')),
-) + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+)